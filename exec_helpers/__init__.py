@@ -26,10 +26,15 @@ from .exceptions import (
 )
 
 from .exec_result import ExecResult
+from ._output_buffer import OutputStats
+from .exec_stream import ExecStream
 from .api import ExecHelper
 from .ssh_auth import SSHAuth
 from .ssh_client import SSHClient
 from .subprocess_runner import Subprocess  # nosec  # Expected
+from .parallel_executor import ParallelExecutor
+from .governor import Governor, GovernorStats, get_governor, set_governor
+from .result_store import ResultStore
 
 __all__ = (
     'ExecHelperError',
@@ -42,8 +47,16 @@ __all__ = (
     'SSHClient',
     'SSHAuth',
     'Subprocess',
+    'ParallelExecutor',
+    'Governor',
+    'GovernorStats',
+    'get_governor',
+    'set_governor',
+    'ResultStore',
     'ExitCodes',
     'ExecResult',
+    'OutputStats',
+    'ExecStream',
 )
 
 __version__ = '2.0.2'
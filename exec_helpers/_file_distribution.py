@@ -0,0 +1,245 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Local files shared between parallel uploads.
+
+.. versionadded:: 2.1.0
+"""
+
+import contextlib
+import mmap
+import os
+import threading
+import time
+import typing
+
+__all__ = ('Throttle', 'SharedReader', 'LocalTree')
+
+
+class Throttle:
+    """Aggregate bandwidth limit for all readers."""
+
+    __slots__ = (
+        '__rate',
+        '__lock',
+        '__next',
+    )
+
+    def __init__(self, rate: typing.Union[int, float]) -> None:
+        """Aggregate bandwidth limit for all readers.
+
+        :param rate: bytes per second
+        :type rate: typing.Union[int, float]
+        :raises ValueError: rate is not positive
+        """
+        if rate <= 0:
+            raise ValueError('bandwidth should be positive, got {!r}'.format(rate))
+        self.__rate = rate
+        self.__lock = threading.Lock()
+        self.__next = time.monotonic()
+
+    def consume(self, size: int) -> None:
+        """Wait until size bytes can be transferred.
+
+        :param size: amount of bytes
+        :type size: int
+        """
+        with self.__lock:
+            now = time.monotonic()
+            start = max(self.__next, now)
+            self.__next = start + size / self.__rate
+        if start > now:
+            time.sleep(start - now)
+
+
+class SharedReader:
+    """Read-only file-like object over shared data with own position."""
+
+    __slots__ = (
+        '__data',
+        '__pos',
+        '__throttle',
+    )
+
+    def __init__(self, data: memoryview, throttle: typing.Optional[Throttle] = None) -> None:
+        """Read-only file-like object over shared data with own position.
+
+        :param data: file content
+        :type data: memoryview
+        :param throttle: bandwidth limit
+        :type throttle: typing.Optional[Throttle]
+        """
+        self.__data = data
+        self.__pos = 0
+        self.__throttle = throttle
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes.
+
+        :param size: maximum amount of bytes. All remaining data if negative.
+        :type size: int
+        :rtype: bytes
+        """
+        end = len(self.__data) if size < 0 else min(self.__pos + size, len(self.__data))
+        chunk = bytes(self.__data[self.__pos:end])
+        self.__pos = end
+        if self.__throttle is not None and chunk:
+            self.__throttle.consume(len(chunk))
+        return chunk
+
+
+class LocalTree:
+    """Local file or directory for upload to multiple remotes.
+
+    Files are mapped to memory on demand: one mapping per file is shared by all concurrent uploads
+    and closed when the last upload of the file is finished, so open descriptors do not depend on tree size.
+    Use as context manager: files are collected on enter, remaining mappings are closed on exit.
+    """
+
+    __slots__ = (
+        '__source',
+        '__dirs',
+        '__files',
+        '__maps',
+        '__lock',
+    )
+
+    def __init__(self, source: str) -> None:
+        """Local file or directory for upload to multiple remotes.
+
+        :param source: local path
+        :type source: str
+        """
+        self.__source = os.path.expanduser(source)
+        self.__dirs = []  # type: typing.List[str]
+        self.__files = []  # type: typing.List[typing.Tuple[str, str]]
+        # file index: (mapping, view, amount of users)
+        self.__maps = {}  # type: typing.Dict[int, typing.Tuple[typing.Optional[mmap.mmap], memoryview, int]]
+        self.__lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        """Source base name.
+
+        :rtype: str
+        """
+        return os.path.basename(os.path.normpath(self.__source))
+
+    @property
+    def is_dir(self) -> bool:
+        """Source is directory.
+
+        :rtype: bool
+        """
+        return os.path.isdir(self.__source)
+
+    @property
+    def dirs(self) -> typing.List[str]:
+        """Directories relative to source in POSIX format, parents first.
+
+        :rtype: typing.List[str]
+        """
+        return self.__dirs
+
+    @property
+    def files(self) -> typing.List[str]:
+        """Files relative to source in POSIX format. Empty string for file source.
+
+        :rtype: typing.List[str]
+        """
+        return [relpath for relpath, _ in self.__files]
+
+    @property
+    def mapped(self) -> int:
+        """Amount of currently mapped files.
+
+        :rtype: int
+        """
+        return len(self.__maps)
+
+    @contextlib.contextmanager
+    def content(self, index: int) -> typing.Iterator[memoryview]:
+        """Context manager: file content, mapped once for all concurrent users.
+
+        :param index: file index in files
+        :type index: int
+        :rtype: typing.Iterator[memoryview]
+        """
+        with self.__lock:
+            if index in self.__maps:
+                mapped, view, users = self.__maps[index]
+            else:
+                mapped, view, users = self.__map(self.__files[index][1]) + (0, )
+            self.__maps[index] = mapped, view, users + 1
+        try:
+            yield view
+        finally:
+            with self.__lock:
+                mapped, view, users = self.__maps[index]
+                if users > 1:
+                    self.__maps[index] = mapped, view, users - 1
+                else:
+                    del self.__maps[index]
+                    self.__unmap(mapped, view)
+
+    @staticmethod
+    def __map(path: str) -> typing.Tuple[typing.Optional[mmap.mmap], memoryview]:
+        """Map file content."""
+        with open(path, 'rb') as src:
+            if not os.fstat(src.fileno()).st_size:  # Empty file can not be mapped
+                return None, memoryview(b'')
+            mapped = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapped, memoryview(mapped)
+
+    @staticmethod
+    def __unmap(mapped: typing.Optional[mmap.mmap], view: memoryview) -> None:
+        """Release mapped file."""
+        view.release()
+        if mapped is not None:
+            mapped.close()
+
+    def open(self) -> None:
+        """Collect files."""
+        if not self.is_dir:
+            self.__files.append(('', self.__source))
+            return
+
+        for rootdir, _, files in os.walk(self.__source):
+            reldir = os.path.relpath(rootdir, self.__source).replace(os.sep, '/')
+            self.__dirs.append(reldir)
+            for entry in files:
+                self.__files.append(
+                    (
+                        '/'.join((reldir, entry)) if reldir != '.' else entry,
+                        os.path.join(rootdir, entry)
+                    )
+                )
+
+    def close(self) -> None:
+        """Release mapped files."""
+        with self.__lock:
+            for mapped, view, _ in self.__maps.values():
+                self.__unmap(mapped, view)
+            self.__maps = {}
+        self.__files = []
+        self.__dirs = []
+
+    def __enter__(self) -> 'LocalTree':
+        """Context manager: collect files."""
+        self.open()
+        return self
+
+    def __exit__(self, exc_type: typing.Any, exc_val: typing.Any, exc_tb: typing.Any) -> None:
+        """Context manager: release mapped files."""
+        self.close()
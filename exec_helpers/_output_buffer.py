@@ -0,0 +1,537 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Output storage for execution result.
+
+.. versionadded:: 2.1.0
+"""
+
+import array
+import codecs
+import collections
+import copy
+import hashlib
+import itertools
+import lzma
+import mmap
+import re
+import tempfile
+import threading
+import typing
+import zlib
+
+__all__ = ('OutputBuffer', 'OutputStats', 'new_hash')
+
+# blake2b is available since python 3.6
+new_hash = getattr(hashlib, 'blake2b', hashlib.sha256)
+
+# Compressed storage: data is compressed in independent blocks for partial access
+COMPACT_BLOCK = 256 * 1024
+_Pattern = type(re.compile(''))
+_CaptureFilter = typing.Union[typing.Pattern, typing.Callable[[bytes], bool], None]
+
+_CODECS = {
+    'zlib': (zlib.compress, zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+}
+
+# Lines in brief output: head + marker + tail
+BRIEF_HEAD = 3
+BRIEF_TAIL = 3
+BRIEF_MARKER = b'...\n'
+
+OutputStats = collections.namedtuple(
+    'OutputStats',
+    ['lines', 'bytes', 'lines_dropped', 'bytes_dropped']
+)
+OutputStats.__doc__ = """Output stream metrics.
+
+lines: amount of received lines
+bytes: amount of received bytes
+lines_dropped: amount of lines not retained due to capture limits or filter
+bytes_dropped: amount of bytes not retained due to capture limits or filter
+"""
+
+
+class OutputBuffer:
+    """Compact growable output storage: contiguous data and line end offsets.
+
+    Each stored line costs 8 bytes of index instead of separate bytes object.
+    Lines tuple is built on demand and cached while data is in memory.
+    Data is moved to temporary file when spill threshold is exceeded and read via memory map.
+    If capture filter is set, only matching lines are retained.
+    If capture limits are set, only first and last lines are retained: last lines are kept in ring buffer.
+    Finished output can be compressed: see compacted().
+    Not thread-safe: protected by result lock. Text decoding is protected by own lock: buffer can be shared.
+    """
+
+    __slots__ = (
+        '__data',
+        '__ends',
+        '__lines_tuple',
+        '__spill_threshold',
+        '__file',
+        '__map',
+        '__bytes',
+        '__head',
+        '__tail',
+        '__tail_size',
+        '__lines_dropped',
+        '__bytes_dropped',
+        '__gap',
+        '__encoding',
+        '__decoder',
+        '__text',
+        '__decoded',
+        '__decode_lock',
+        '__frozen',
+        '__hash',
+        '__lengths_hash',
+        '__blocks',
+        '__decompress',
+        '__block_cache',
+        '__capture_filter',
+        '__predicate',
+    )
+
+    def __init__(
+        self,
+        lines: typing.Iterable[bytes] = (),
+        spill_threshold: typing.Optional[int] = None,
+        capture_head: typing.Optional[int] = None,
+        capture_tail: typing.Optional[int] = None,
+        encoding: str = 'utf-8',
+        capture_filter: _CaptureFilter = None,
+    ) -> None:
+        """Compact growable output storage.
+
+        :param lines: initial output lines
+        :type lines: typing.Iterable[bytes]
+        :param spill_threshold: size in bytes to move data to temporary file. Never if None.
+        :type spill_threshold: typing.Optional[int]
+        :param capture_head: amount of first lines to retain. All lines if both limits are None.
+        :type capture_head: typing.Optional[int]
+        :param capture_tail: amount of last lines to retain. All lines if both limits are None.
+        :type capture_tail: typing.Optional[int]
+        :param encoding: output encoding for text decoding
+        :type encoding: str
+        :param capture_filter: retain only matching lines: regex (str patterns match decoded lines) or predicate
+        :type capture_filter: typing.Union[typing.Pattern, typing.Callable[[bytes], bool], None]
+        :raises ValueError: capture limit is negative
+        :raises LookupError: unknown encoding
+        """
+        for name, limit in (('capture_head', capture_head), ('capture_tail', capture_tail)):
+            if limit is not None and limit < 0:
+                raise ValueError('{name} should not be negative, got {limit!r}'.format(name=name, limit=limit))
+        self.__data = bytearray()
+        self.__ends = array.array('Q')
+        self.__lines_tuple = None  # type: typing.Optional[typing.Tuple[bytes, ...]]
+        self.__spill_threshold = spill_threshold
+        self.__file = None  # type: typing.Optional[typing.BinaryIO]
+        self.__map = None  # type: typing.Optional[mmap.mmap]
+        self.__bytes = None  # type: typing.Optional[bytes]
+
+        if capture_head is None and capture_tail is None:
+            self.__head = None  # type: typing.Optional[int]
+        else:
+            self.__head = capture_head or 0
+        self.__tail = collections.deque(maxlen=capture_tail or 0)  # type: typing.Deque[bytes]
+        self.__tail_size = 0
+        self.__lines_dropped = 0
+        self.__bytes_dropped = 0
+        self.__gap = False  # Lines between first and last lines are dropped
+
+        self.__encoding = encoding
+        self.__decoder = codecs.getincrementaldecoder(encoding)(errors='backslashreplace')
+        self.__text = ''
+        self.__decoded = 0  # Amount of first lines decoded to text
+        self.__decode_lock = threading.Lock()
+        self.__frozen = False
+
+        # Digest of first lines: content and line lengths. Last lines are added on digest calculation.
+        self.__hash = new_hash()
+        self.__lengths_hash = new_hash()
+
+        # Compressed storage
+        self.__blocks = None  # type: typing.Optional[typing.List[bytes]]
+        self.__decompress = zlib.decompress  # type: typing.Callable[[bytes], bytes]
+        self.__block_cache = None  # type: typing.Optional[typing.Tuple[int, bytes]]
+
+        self.__capture_filter = capture_filter
+        self.__predicate = self.__make_predicate(capture_filter, encoding)
+
+        self.extend(lines)
+
+    @staticmethod
+    def __make_predicate(
+        capture_filter: _CaptureFilter,
+        encoding: str
+    ) -> typing.Optional[typing.Callable[[bytes], typing.Any]]:
+        """Line predicate from capture filter."""
+        if not isinstance(capture_filter, _Pattern):
+            return capture_filter  # type: ignore
+        if isinstance(capture_filter.pattern, bytes):  # type: ignore
+            return capture_filter.search  # type: ignore
+
+        def search(line: bytes) -> typing.Any:
+            """Match decoded line."""
+            return capture_filter.search(line.decode(encoding, errors='backslashreplace'))  # type: ignore
+        return search
+
+    def __spill(self) -> None:
+        """Move data to temporary file."""
+        self.__file = tempfile.TemporaryFile()  # pylint: disable=consider-using-with
+        self.__file.write(self.__data)
+        self.__data = bytearray()
+        # Spilled data is decoded in one pass: decoded text is not kept in memory
+        self.__decoder.reset()
+        self.__text = ''
+        self.__decoded = 0
+
+    def __push_tail(self, line: bytes) -> None:
+        """Put line to ring buffer of last lines, drop the oldest one if full."""
+        tail = self.__tail
+        if len(tail) == tail.maxlen:
+            dropped = tail[0] if tail else line
+            self.__gap = True
+            self.__lines_dropped += 1
+            self.__bytes_dropped += len(dropped)
+            if not tail:
+                return
+            self.__tail_size -= len(dropped)
+        tail.append(line)
+        self.__tail_size += len(line)
+
+    def extend(self, lines: typing.Iterable[bytes]) -> None:
+        """Append lines.
+
+        :param lines: new output lines
+        :type lines: typing.Iterable[bytes]
+        """
+        ends = self.__ends
+        head = self.__head
+        threshold = self.__spill_threshold
+        predicate = self.__predicate
+        size = ends[-1] if ends else 0
+        lengths = array.array('Q')
+        received = False
+        for line in lines:
+            received = True
+            if predicate is not None and not predicate(line):
+                self.__lines_dropped += 1
+                self.__bytes_dropped += len(line)
+                continue
+            if head is not None and len(ends) >= head:
+                self.__push_tail(line)
+                continue
+            self.__hash.update(line)
+            lengths.append(len(line))
+            if self.__file is not None:
+                self.__file.write(line)
+            else:
+                self.__data += line
+                if threshold is not None and len(self.__data) > threshold:
+                    self.__spill()
+            size += len(line)
+            ends.append(size)
+        if lengths:
+            self.__lengths_hash.update(lengths.tobytes())
+        if received:
+            # Map is closed on garbage collection: views exported earlier stay valid
+            self.__lines_tuple = self.__map = self.__bytes = None
+
+    @property
+    def encoding(self) -> str:
+        """Output encoding.
+
+        :rtype: str
+        """
+        return self.__encoding
+
+    def text(self) -> str:
+        """Retained data decoded to text.
+
+        First lines are decoded incrementally: only data appended since previous call is decoded,
+        partial code points are kept by decoder till the next lines.
+        Decoder state is protected by buffer lock: buffer can be shared between results.
+        Frozen, spilled and compressed data is decoded in one pass on each call: decoded text is not kept in memory.
+
+        :rtype: str
+        """
+        with self.__decode_lock:
+            incremental = not self.__frozen and self.__file is None and self.__blocks is None
+            if incremental:
+                ends = self.__ends
+                if self.__decoded < len(ends):
+                    start = ends[self.__decoded - 1] if self.__decoded else 0
+                    with self.__view() as view:
+                        self.__text += self.__decoder.decode(view[start:ends[-1]])
+                    self.__decoded = len(ends)
+
+                # Decode pending partial code point and last lines without changing decoder state
+                rest = codecs.getincrementaldecoder(self.__encoding)(errors='backslashreplace')
+                rest.setstate(self.__decoder.getstate())
+                text = self.__text
+        if not incremental:
+            rest = codecs.getincrementaldecoder(self.__encoding)(errors='backslashreplace')
+            with self.__view() as view:
+                text = rest.decode(view)
+        if self.__gap:
+            tail = codecs.decode(b''.join(self.__tail), self.__encoding, 'backslashreplace')
+            return text + rest.decode(b'', final=True) + tail
+        return text + rest.decode(b''.join(self.__tail), final=True)
+
+    def freeze(self) -> None:
+        """Mark output as finished: incremental decoding state is dropped, data in memory is joined once.
+
+        Text of finished output is cached by result only, views of data in memory share one immutable copy.
+        """
+        with self.__decode_lock:
+            if self.__frozen:
+                return
+            if self.__file is None and self.__blocks is None:
+                if self.__bytes is None:
+                    self.__data += b''.join(self.__tail)
+                    self.__bytes = bytes(self.__data)
+                self.__data = self.__bytes
+            self.__frozen = True
+            self.__decoder.reset()
+            self.__text = ''
+            self.__decoded = 0
+
+    def __view(self) -> memoryview:
+        """View of first lines data: memory, mapped temporary file or decompressed data."""
+        if self.__blocks is not None:
+            return memoryview(b''.join(self.__decompress(block) for block in self.__blocks))
+        if self.__file is None:
+            if self.__frozen and self.__tail:  # Joined data includes last lines
+                return memoryview(self.__data)[:len(self.__data) - self.__tail_size]
+            return memoryview(self.__data)
+        if self.__map is None:
+            self.__file.flush()
+            self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self.__map)
+
+    def __block(self, index: int) -> bytes:
+        """Decompressed block, the last one is cached for sequential access."""
+        cache = self.__block_cache
+        if cache is None or cache[0] != index:
+            cache = self.__block_cache = index, self.__decompress(self.__blocks[index])  # type: ignore
+        return cache[1]
+
+    def __read(self, start: int, stop: int) -> bytes:
+        """Compressed data in range [start, stop)."""
+        chunks = []
+        while start < stop:
+            offset = start - start % COMPACT_BLOCK
+            block = self.__block(start // COMPACT_BLOCK)
+            chunks.append(block[start - offset:stop - offset])
+            start = offset + len(block)
+        return b''.join(chunks)
+
+    def __slice(self, start: int, stop: int) -> typing.Tuple[bytes, ...]:
+        """First lines in range [start, stop)."""
+        ends = self.__ends
+        if self.__blocks is not None:
+            return tuple(
+                self.__read(ends[idx - 1] if idx else 0, ends[idx])
+                for idx in range(start, stop)
+            )
+        with self.__view() as view:
+            return tuple(
+                view[ends[idx - 1] if idx else 0:ends[idx]].tobytes()
+                for idx in range(start, stop)
+            )
+
+    def offsets(self) -> array.array:
+        """End offsets of all retained lines in joined data (see view()).
+
+        :rtype: array.array
+        """
+        offsets = array.array('Q', self.__ends)
+        size = offsets[-1] if offsets else 0
+        for line in self.__tail:
+            size += len(line)
+            offsets.append(size)
+        return offsets
+
+    def get_lines(self, start: int, stop: int) -> typing.Tuple[bytes, ...]:
+        """Retained lines in range [start, stop) without building all lines tuple.
+
+        :param start: first line index
+        :type start: int
+        :param stop: index after last line
+        :type stop: int
+        :rtype: typing.Tuple[bytes, ...]
+        """
+        if self.__lines_tuple is not None:
+            return self.__lines_tuple[start:stop]
+        count = len(self.__ends)
+        stop = min(stop, len(self))
+        head = self.__slice(min(start, count), min(stop, count))
+        return head + tuple(itertools.islice(self.__tail, max(start - count, 0), max(stop - count, 0)))
+
+    @property
+    def lines(self) -> typing.Tuple[bytes, ...]:
+        """Retained output lines.
+
+        :rtype: typing.Tuple[bytes, ...]
+        """
+        if self.__lines_tuple is not None:
+            return self.__lines_tuple
+        lines = self.__slice(0, len(self.__ends)) + tuple(self.__tail)
+        if self.__file is None and self.__blocks is None:  # Spilled and compressed data is not kept in memory
+            self.__lines_tuple = lines
+        return lines
+
+    @property
+    def brief_lines(self) -> typing.Tuple[bytes, ...]:
+        """Brief output: all lines if 7 or less, else 3 first, marker and 3 last lines.
+
+        Marker is always placed instead of dropped lines.
+
+        :rtype: typing.Tuple[bytes, ...]
+        """
+        count = len(self.__ends)
+        if self.__gap:
+            head = self.__slice(0, min(count, BRIEF_HEAD))
+            return head + (BRIEF_MARKER, ) + tuple(self.__tail)[-BRIEF_TAIL:]
+        if self.__tail:  # Retained lines amount is limited
+            lines = self.lines
+            if len(lines) <= BRIEF_HEAD + BRIEF_TAIL + 1:
+                return lines
+            return lines[:BRIEF_HEAD] + (BRIEF_MARKER, ) + lines[-BRIEF_TAIL:]
+        if count <= BRIEF_HEAD + BRIEF_TAIL + 1:
+            return self.__slice(0, count)
+        return self.__slice(0, BRIEF_HEAD) + (BRIEF_MARKER, ) + self.__slice(count - BRIEF_TAIL, count)
+
+    @property
+    def size(self) -> int:
+        """Amount of retained bytes.
+
+        :rtype: int
+        """
+        return (self.__ends[-1] if self.__ends else 0) + self.__tail_size
+
+    @property
+    def stats(self) -> OutputStats:
+        """Output stream metrics.
+
+        :rtype: OutputStats
+        """
+        return OutputStats(
+            lines=len(self) + self.__lines_dropped,
+            bytes=self.size + self.__bytes_dropped,
+            lines_dropped=self.__lines_dropped,
+            bytes_dropped=self.__bytes_dropped,
+        )
+
+    @property
+    def compressed(self) -> bool:
+        """Data is compressed.
+
+        :rtype: bool
+        """
+        return self.__blocks is not None
+
+    def compacted(self, method: str = 'zlib') -> 'OutputBuffer':
+        """Copy of storage with compressed data, for finished output only.
+
+        Data is decompressed on access and not cached, except the last used block.
+
+        :param method: compression method: "zlib" or "lzma"
+        :type method: str
+        :rtype: OutputBuffer
+        :raises ValueError: unknown compression method
+        """
+        if method not in _CODECS:
+            raise ValueError('method should be one of {}, got {!r}'.format(sorted(_CODECS), method))
+        compress, decompress = _CODECS[method]
+        with self.__view() as view:
+            blocks = [compress(view[pos:pos + COMPACT_BLOCK]) for pos in range(0, len(view), COMPACT_BLOCK)]
+
+        buffer = copy.copy(self)
+        buffer.__blocks = blocks
+        buffer.__decompress = decompress
+        buffer.__block_cache = None
+        buffer.__data = bytearray()
+        buffer.__file = buffer.__map = buffer.__bytes = buffer.__lines_tuple = None
+        buffer.__decoder = codecs.getincrementaldecoder(self.__encoding)(errors='backslashreplace')
+        buffer.__text = ''
+        buffer.__decoded = 0
+        buffer.__decode_lock = threading.Lock()
+        buffer.__frozen = True
+        return buffer
+
+    @property
+    def spilled(self) -> bool:
+        """Data is stored in temporary file.
+
+        :rtype: bool
+        """
+        return self.__file is not None
+
+    def view(self) -> memoryview:
+        """Read-only view of all retained data.
+
+        Data is joined to one cached copy until next append: growing buffer can not be exported without copy.
+        Finished data in memory is stored as this copy only.
+        Spilled data without last lines is viewed directly via memory map, compressed data is decompressed on each call.
+
+        :rtype: memoryview
+        """
+        if self.__blocks is not None:  # Decompressed data is not kept in memory
+            with self.__view() as view:
+                return memoryview(view.tobytes() + b''.join(self.__tail))
+        if self.__file is not None and not self.__tail:
+            return self.__view()
+        if self.__bytes is None:
+            with self.__view() as view:
+                self.__bytes = view.tobytes() + b''.join(self.__tail)
+        return memoryview(self.__bytes)
+
+    def to_bytearray(self) -> bytearray:
+        """Copy of all retained data.
+
+        :rtype: bytearray
+        """
+        with self.view() as view:
+            return bytearray(view)
+
+    def digest(self) -> bytes:
+        """Digest of all retained data and line boundaries, updated incrementally on append.
+
+        Dropped lines are not included: equal retained output gives equal digest.
+
+        :rtype: bytes
+        """
+        digest = self.__hash.copy()
+        lengths = self.__lengths_hash.copy()
+        if self.__tail:
+            for line in self.__tail:
+                digest.update(line)
+            lengths.update(array.array('Q', (len(line) for line in self.__tail)).tobytes())
+        digest.update(lengths.digest())
+        return digest.digest()
+
+    def key(self) -> typing.Tuple[typing.Hashable, ...]:
+        """Content key for deduplication: retained data digest, capture limits and filter, encoding.
+
+        :rtype: typing.Tuple[typing.Hashable, ...]
+        """
+        return self.digest(), self.__head, self.__tail.maxlen, self.__encoding, self.__capture_filter
+
+    def __len__(self) -> int:
+        """Amount of retained lines."""
+        return len(self.__ends) + len(self.__tail)
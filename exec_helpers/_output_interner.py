@@ -0,0 +1,96 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Output deduplication for multiple execution results.
+
+.. versionadded:: 2.1.0
+"""
+
+import typing
+
+from exec_helpers import exec_result
+from exec_helpers import _output_buffer
+
+__all__ = ('OutputInterner', 'output_digest', 'group_by_output')
+
+
+class OutputInterner:
+    """Share storage of identical output between execution results.
+
+    Results with equal output streams share one storage object,
+    so memory usage grows only with amount of distinct output.
+    Not thread-safe: intern results from one thread.
+    """
+
+    __slots__ = (
+        '__streams',
+    )
+
+    def __init__(self) -> None:
+        """Share storage of identical output between execution results."""
+        self.__streams = {}  # type: typing.Dict[typing.Tuple[typing.Hashable, ...], _output_buffer.OutputBuffer]
+
+    def __intern_stream(self, stream: _output_buffer.OutputBuffer) -> _output_buffer.OutputBuffer:
+        """Get shared storage of output stream."""
+        return self.__streams.setdefault(stream.key(), stream)
+
+    def intern(self, result: exec_result.ExecResult) -> exec_result.ExecResult:
+        """Replace result output by shared storage.
+
+        :param result: execution result
+        :type result: ExecResult
+        :return: the same result object
+        :rtype: ExecResult
+        """
+        # pylint: disable=protected-access
+        stdout, stderr = result._output_buffers
+        result._set_shared_output(
+            stdout=self.__intern_stream(stdout),
+            stderr=self.__intern_stream(stderr),
+        )
+        # pylint: enable=protected-access
+        return result
+
+
+def output_digest(result: exec_result.ExecResult) -> str:
+    """Digest of result output: exit code, stdout and stderr.
+
+    :param result: execution result
+    :type result: ExecResult
+    :return: hex digest
+    :rtype: str
+    """
+    digest = _output_buffer.new_hash()
+    digest.update(str(int(result.exit_code)).encode('ascii'))
+    for stream in result._output_buffers:  # pylint: disable=protected-access
+        digest.update(stream.digest())
+    return digest.hexdigest()
+
+
+def group_by_output(
+    results: typing.Dict[typing.Any, exec_result.ExecResult]
+) -> typing.Dict[str, typing.List[typing.Any]]:
+    """Group result keys by identical output.
+
+    :param results: execution results
+    :type results: typing.Dict[typing.Any, ExecResult]
+    :return: dictionary {digest: [key, ...]}
+    :rtype: typing.Dict[str, typing.List[typing.Any]]
+
+    Output digests are maintained incrementally by result storage: data is not read again.
+    """
+    groups = {}  # type: typing.Dict[str, typing.List[typing.Any]]
+    for key, result in results.items():
+        groups.setdefault(output_digest(result), []).append(key)
+    return groups
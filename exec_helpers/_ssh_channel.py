@@ -0,0 +1,162 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Thread-free paramiko channel output reader.
+
+.. versionadded:: 2.1.0
+"""
+
+import select
+import time
+import typing
+
+import paramiko  # type: ignore
+
+from exec_helpers import exceptions
+from exec_helpers import exec_result
+
+__all__ = ('ChannelReader', )
+
+# Maximum bytes to fetch from channel buffer per recv call
+RECV_SIZE = 32768
+
+# Maximum time to wait for readiness if channel pipe is not triggered (exit status arrives without data)
+POLL_INTERVAL = 0.1
+
+
+class ChannelReader:
+    """Non-blocking line reader for paramiko channel.
+
+    Data is pulled directly from channel buffers, so no polling thread is required.
+    Lines are split on ``\\n`` with line endings kept, same as ``ChannelFile`` iteration.
+    """
+
+    __slots__ = (
+        '__channel',
+        '__read_stdout',
+        '__read_stderr',
+        '__tails',
+    )
+
+    def __init__(
+        self,
+        channel: paramiko.Channel,
+        read_stdout: bool = True,
+        read_stderr: bool = True,
+    ) -> None:
+        """Non-blocking line reader for paramiko channel.
+
+        :param channel: channel with executed command
+        :type channel: paramiko.Channel
+        :param read_stdout: produce STDOUT lines. If disabled - data is drained and dropped.
+        :type read_stdout: bool
+        :param read_stderr: produce STDERR lines. If disabled - data is drained and dropped.
+        :type read_stderr: bool
+        """
+        self.__channel = channel
+        self.__read_stdout = read_stdout
+        self.__read_stderr = read_stderr
+        self.__tails = {'stdout': b'', 'stderr': b''}  # type: typing.Dict[str, bytes]
+
+    @property
+    def channel(self) -> paramiko.Channel:
+        """Source channel.
+
+        :rtype: paramiko.Channel
+        """
+        return self.__channel
+
+    @property
+    def exit_status_ready(self) -> bool:
+        """Exit status received: all data is already in channel buffers.
+
+        :rtype: bool
+        """
+        return self.__channel.status_event.is_set()  # type: ignore
+
+    def __split(self, name: str, data: bytes, final: bool) -> typing.List[typing.Tuple[str, bytes]]:
+        """Split data to lines with respect to not completed line from previous call."""
+        data = self.__tails[name] + data
+        end = data.rfind(b'\n') + 1
+        self.__tails[name] = data[end:]
+        lines = [(name, line + b'\n') for line in data[:end - 1].split(b'\n')] if end else []
+        if final and self.__tails[name]:
+            lines.append((name, self.__tails[name]))
+            self.__tails[name] = b''
+        return lines
+
+    def read(self, final: bool = False) -> typing.List[typing.Tuple[str, bytes]]:
+        """Read all available data from channel without blocking.
+
+        :param final: no more data expected: flush not completed lines
+        :type final: bool
+        :return: list of (stream name, line) in order of receive per stream, STDOUT first
+        :rtype: typing.List[typing.Tuple[str, bytes]]
+        """
+        stdout_chunks = []
+        while self.__channel.recv_ready():
+            stdout_chunks.append(self.__channel.recv(RECV_SIZE))
+        stderr_chunks = []
+        while self.__channel.recv_stderr_ready():
+            stderr_chunks.append(self.__channel.recv_stderr(RECV_SIZE))
+
+        lines = []  # type: typing.List[typing.Tuple[str, bytes]]
+        if self.__read_stdout:
+            lines.extend(self.__split('stdout', b''.join(stdout_chunks), final))
+        if self.__read_stderr:
+            lines.extend(self.__split('stderr', b''.join(stderr_chunks), final))
+        return lines
+
+    def read_to(self, result: exec_result.ExecResult, final: bool = False) -> None:
+        """Read all available data from channel without blocking and store in result.
+
+        :param result: target execution result
+        :type result: ExecResult
+        :param final: no more data expected: flush not completed lines
+        :type final: bool
+        """
+        lines = self.read(final=final)
+        result.read_stdout(src=[line for name, line in lines if name == 'stdout'])
+        result.read_stderr(src=[line for name, line in lines if name == 'stderr'])
+
+    def wait(self, timeout: typing.Union[int, float, None] = None) -> None:
+        """Wait for data in channel buffers.
+
+        :param timeout: maximum time to wait. Limited by POLL_INTERVAL to detect exit status.
+        :type timeout: typing.Union[int, float, None]
+        """
+        if timeout is None or timeout > POLL_INTERVAL:
+            timeout = POLL_INTERVAL
+        select.select([self.__channel], [], [], timeout)
+
+    def read_all_to(self, result: exec_result.ExecResult, timeout: typing.Union[int, float, None] = None) -> None:
+        """Read data from channel to result until exit status received.
+
+        :param result: target execution result
+        :type result: ExecResult
+        :param timeout: timeout for exit status wait
+        :type timeout: typing.Union[int, float, None]
+        :raises ExecHelperTimeoutError: Timeout exceeded. Already received output is stored in result.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            done = self.exit_status_ready
+            self.read_to(result, final=done)
+            if done:
+                return
+
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                raise exceptions.ExecHelperTimeoutError(result=result, timeout=timeout)  # type: ignore
+            self.wait(remaining)
@@ -22,6 +22,7 @@ import collections
 import concurrent.futures
 import copy
 import logging
+import math
 import platform
 import stat
 import sys
@@ -39,9 +40,13 @@ from exec_helpers import api
 from exec_helpers import constants
 from exec_helpers import exec_result
 from exec_helpers import exceptions
+from exec_helpers import governor
 from exec_helpers import proc_enums
 from exec_helpers import ssh_auth
 from exec_helpers import _log_templates
+from exec_helpers import _output_interner
+from exec_helpers import _ssh_channel
+from exec_helpers import _ssh_reactor
 
 __all__ = ('SSHClientBase', )
 
@@ -363,6 +368,16 @@ class SSHClientBase(api.ExecHelper, metaclass=_MemorizedSSH):
         """
         return self.__port
 
+    @property
+    def _governor_key(self) -> typing.Tuple[str, int]:
+        """Target host identifier for per-host limits of concurrency governor.
+
+        :rtype: typing.Tuple[str, int]
+
+        .. versionadded:: 2.1.0
+        """
+        return self.hostname, self.port
+
     @property
     def is_alive(self) -> bool:
         """Paramiko status: ready to use|reconnect required.
@@ -722,7 +737,7 @@ class SSHClientBase(api.ExecHelper, metaclass=_MemorizedSSH):
         )
 
         # Store command with hidden data
-        result = exec_result.ExecResult(cmd=cmd_for_log)
+        result = self._make_result(cmd_for_log, **kwargs)
 
         stop_event = threading.Event()
 
@@ -749,6 +764,75 @@ class SSHClientBase(api.ExecHelper, metaclass=_MemorizedSSH):
         self.logger.debug(wait_err_msg)
         raise exceptions.ExecHelperTimeoutError(result=result, timeout=timeout)  # type: ignore
 
+    def _stream_command(
+        self,
+        command: str,
+        interface: paramiko.channel.Channel,
+        stdout: typing.Optional[paramiko.ChannelFile],
+        stderr: typing.Optional[paramiko.ChannelFile],
+        timeout: typing.Union[int, float, None],
+        verbose: bool = False,
+        log_mask_re: typing.Optional[str] = None,
+        **kwargs: typing.Any
+    ) -> typing.Generator[typing.Tuple[str, bytes], None, typing.Union[int, proc_enums.ExitCodes]]:
+        """Get output lines from channel as they arrive and return exit code.
+
+        :type command: str
+        :type interface: paramiko.channel.Channel
+        :type stdout: typing.Optional[paramiko.ChannelFile]
+        :type stderr: typing.Optional[paramiko.ChannelFile]
+        :type timeout: typing.Union[int, float, None]
+        :type verbose: bool
+        :param log_mask_re: regex lookup rule to mask command for logger.
+                            all MATCHED groups will be replaced by '<*masked*>'
+        :type log_mask_re: typing.Optional[str]
+        :rtype: typing.Generator[typing.Tuple[str, bytes], None, typing.Union[int, proc_enums.ExitCodes]]
+        :raises ExecHelperTimeoutError: Timeout exceeded
+
+        Channel is read directly from the caller thread: no polling threads are used.
+        Channel is not closed by generator: use _stop_command on close.
+
+        .. versionadded:: 2.1.0
+        """
+        reader = _ssh_channel.ChannelReader(
+            interface,
+            read_stdout=stdout is not None,
+            read_stderr=stderr is not None,
+        )
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            done = reader.exit_status_ready
+            for name, line in reader.read(final=done):
+                self.logger.log(  # type: ignore
+                    level=logging.INFO if verbose else logging.DEBUG,
+                    msg=line.decode('utf-8', errors='backslashreplace').rstrip()
+                )
+                yield name, line
+            if done:
+                return interface.exit_status  # type: ignore
+
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                result = exec_result.ExecResult(cmd=self._mask_command(cmd=command, log_mask_re=log_mask_re))
+                wait_err_msg = _log_templates.CMD_WAIT_ERROR.format(
+                    result=result,
+                    timeout=timeout
+                )
+                self.logger.debug(wait_err_msg)
+                raise exceptions.ExecHelperTimeoutError(result=result, timeout=timeout)  # type: ignore
+            reader.wait(remaining)
+
+    def _stop_command(self, interface: paramiko.Channel) -> None:
+        """Close channel: remote command is terminated by sshd.
+
+        :param interface: Control interface
+        :type interface: paramiko.Channel
+
+        .. versionadded:: 2.1.0
+        """
+        interface.close()
+
     def execute_through_host(
         self,
         hostname: str,
@@ -781,6 +865,8 @@ class SSHClientBase(api.ExecHelper, metaclass=_MemorizedSSH):
 
         .. versionchanged:: 1.2.0 default timeout 1 hour
         .. versionchanged:: 1.2.0 log_mask_re regex rule for masking cmd
+        .. versionchanged:: 2.1.0 result is queued to result_store if set
+        .. versionchanged:: 2.1.0 slot is acquired from concurrency governor for target host
         """
         cmd_for_log = self._mask_command(
             cmd=command,
@@ -791,77 +877,310 @@ class SSHClientBase(api.ExecHelper, metaclass=_MemorizedSSH):
             msg=_log_templates.CMD_EXEC.format(cmd=cmd_for_log)
         )
 
-        if auth is None:
-            auth = self.auth
+        with governor.get_governor().slot((hostname, target_port)):
+            intermediate_channel, transport = self.__connect_through_host(hostname, auth=auth, target_port=target_port)
+
+            # open ssh session
+            channel = transport.open_session()
+            if get_pty:
+                # Open PTY
+                channel.get_pty(
+                    term='vt100',
+                    width=kwargs.get('width', 80), height=kwargs.get('height', 24),
+                    width_pixels=0, height_pixels=0
+                )
 
-        intermediate_channel = self._ssh.get_transport().open_channel(
-            kind='direct-tcpip',
-            dest_addr=(hostname, target_port),
-            src_addr=(self.hostname, 0))
-        transport = paramiko.Transport(sock=intermediate_channel)
+            # Make proxy objects for read
+            stdout = channel.makefile('rb')
+            stderr = channel.makefile_stderr('rb')
 
-        # start client and authenticate transport
-        auth.connect(transport)
+            channel.exec_command(command)  # nosec  # Sanitize on caller side
 
-        # open ssh session
-        channel = transport.open_session()
-        if get_pty:
-            # Open PTY
-            channel.get_pty(
-                term='vt100',
-                width=kwargs.get('width', 80), height=kwargs.get('height', 24),
-                width_pixels=0, height_pixels=0
+            # noinspection PyDictCreation
+            result = self._exec_command(
+                command, channel, stdout, stderr, timeout, verbose=verbose,
+                log_mask_re=kwargs.get('log_mask_re', None),
             )
 
-        # Make proxy objects for read
-        stdout = channel.makefile('rb')
-        stderr = channel.makefile_stderr('rb')
+            intermediate_channel.close()
 
-        channel.exec_command(command)  # nosec  # Sanitize on caller side
+        if self.result_store is not None:
+            self.result_store.put((hostname, target_port), result)
+        return result
 
-        # noinspection PyDictCreation
-        result = self._exec_command(
-            command, channel, stdout, stderr, timeout, verbose=verbose,
-            log_mask_re=kwargs.get('log_mask_re', None),
-        )
+    def __connect_through_host(
+        self,
+        hostname: str,
+        auth: typing.Optional[ssh_auth.SSHAuth],
+        target_port: int,
+    ) -> typing.Tuple[paramiko.Channel, paramiko.Transport]:
+        """Open authenticated transport to remote host through currently connected host.
+
+        :param hostname: target hostname
+        :type hostname: str
+        :param auth: credentials for target machine
+        :type auth: typing.Optional[ssh_auth.SSHAuth]
+        :param target_port: target port
+        :type target_port: int
+        :return: direct-tcpip channel on current host transport and transport to target over it
+        :rtype: typing.Tuple[paramiko.Channel, paramiko.Transport]
 
-        intermediate_channel.close()
+        Channel and transport are closed if authentication failed.
+        """
+        if auth is None:
+            auth = self.auth
 
-        return result
+        intermediate_channel = self._ssh.get_transport().open_channel(
+            kind='direct-tcpip',
+            dest_addr=(hostname, target_port),
+            src_addr=(self.hostname, 0))
+        try:
+            transport = paramiko.Transport(sock=intermediate_channel)
+        except BaseException:
+            intermediate_channel.close()
+            raise
 
-    @classmethod
-    def execute_together(
-        cls,
-        remotes: typing.Iterable['SSHClientBase'],
+        try:
+            # start client and authenticate transport
+            auth.connect(transport)
+        except BaseException:
+            transport.close()
+            intermediate_channel.close()
+            raise
+        return intermediate_channel, transport
+
+    def execute_together_through_host(
+        self,
+        hostnames: typing.Iterable[str],
         command: str,
+        auth: typing.Optional[ssh_auth.SSHAuth] = None,
+        target_port: int = 22,
         timeout: typing.Union[int, float, None] = constants.DEFAULT_TIMEOUT,
         expected: typing.Optional[typing.Iterable[int]] = None,
         raise_on_err: bool = True,
+        max_workers: typing.Optional[int] = None,
         **kwargs: typing.Any
     ) -> typing.Dict[typing.Tuple[str, int], exec_result.ExecResult]:
-        """Execute command on multiple remotes in async mode.
+        """Execute command on multiple remote hosts through currently connected host.
 
-        :param remotes: Connections to execute on
-        :type remotes: typing.Iterable[SSHClientBase]
+        :param hostnames: target hostnames
+        :type hostnames: typing.Iterable[str]
         :param command: Command for execution
         :type command: str
-        :param timeout: Timeout for command execution.
+        :param auth: credentials for target machines
+        :type auth: typing.Optional[ssh_auth.SSHAuth]
+        :param target_port: target port
+        :type target_port: int
+        :param timeout: Timeout for command execution on each target (counted from command start on target).
         :type timeout: typing.Union[int, float, None]
         :param expected: expected return codes (0 by default)
         :type expected: typing.Optional[typing.Iterable[]]
         :param raise_on_err: Raise exception on unexpected return code
         :type raise_on_err: bool
-        :return: dictionary {(hostname, port): result}
+        :param max_workers: Maximum amount of targets processed simultaneously. 32 by default.
+        :type max_workers: typing.Optional[int]
+        :return: dictionary {(hostname, target_port): result}
         :rtype: typing.Dict[typing.Tuple[str, int], exec_result.ExecResult]
         :raises ParallelCallProcessError: Unexpected any code at lest on one target
         :raises ParallelCallExceptions: At lest one exception raised during execution (including timeout)
 
-        .. versionchanged:: 1.2.0 default timeout 1 hour
-        .. versionchanged:: 1.2.0 log_mask_re regex rule for masking cmd
+        All direct-tcpip channels are multiplexed over the single transport of the current connection.
+
+        .. versionadded:: 2.1.0
         """
-        @threaded.threadpooled  # type: ignore
+        cmd_for_log = self._mask_command(
+            cmd=command,
+            log_mask_re=kwargs.get('log_mask_re', None)
+        )
+        self.logger.debug(_log_templates.CMD_EXEC.format(cmd=cmd_for_log))
+
+        expected = expected or [proc_enums.ExitCodes.EX_OK]
+        expected = proc_enums.exit_codes_to_enums(expected)
+
+        concurrency = governor.get_governor()
+
+        def get_result(hostname: str) -> exec_result.ExecResult:
+            """Get result from target call."""
+            with concurrency.slot((hostname, target_port)):
+                intermediate_channel, transport = self.__connect_through_host(
+                    hostname,
+                    auth=auth,
+                    target_port=target_port
+                )
+                try:
+                    channel = transport.open_session()
+                    channel.exec_command(command)  # nosec  # Sanitize on caller side
+
+                    result = self._make_result(cmd_for_log, **kwargs)
+                    _ssh_channel.ChannelReader(channel).read_all_to(result, timeout=timeout)
+                    result.exit_code = channel.recv_exit_status()
+                    if self.result_store is not None:
+                        self.result_store.put((hostname, target_port), result)
+                    return result
+                finally:
+                    transport.close()
+                    intermediate_channel.close()
+
+        targets = set(hostnames)  # Use distinct targets
+
+        results = {}
+        errors = {}
+        raised_exceptions = {}
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or max(min(len(targets), constants.DEFAULT_MAX_WORKERS), 1)
+        ) as executor:
+            futures = {
+                executor.submit(get_result, hostname): hostname for hostname in targets
+            }  # type: typing.Dict[concurrent.futures.Future, str]
+
+            for future in concurrent.futures.as_completed(futures):
+                key = (futures[future], target_port)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    raised_exceptions[key] = e
+                    continue
+                results[key] = result
+                if result.exit_code not in expected:
+                    errors[key] = result
+
+        if raised_exceptions:  # always raise
+            raise exceptions.ParallelCallExceptions(
+                command,
+                raised_exceptions,
+                errors,
+                results,
+                expected=expected
+            )
+        if errors and raise_on_err:
+            raise exceptions.ParallelCallProcessError(
+                command, errors, results, expected=expected
+            )
+        return results
+
+    @classmethod
+    def execute_together_iter(
+        cls,
+        remotes: typing.Iterable['SSHClientBase'],
+        command: str,
+        timeout: typing.Union[int, float, None] = constants.DEFAULT_TIMEOUT,
+        max_workers: typing.Optional[int] = None,
+        global_timeout: typing.Union[int, float, None] = None,
+        multiplexed: bool = False,
+        **kwargs: typing.Any
+    ) -> typing.Iterator[
+        typing.Tuple[typing.Tuple[str, int], typing.Union[exec_result.ExecResult, Exception]]
+    ]:
+        """Execute command on multiple remotes in async mode and produce results in order of completion.
+
+        :param remotes: Connections to execute on
+        :type remotes: typing.Iterable[SSHClientBase]
+        :param command: Command for execution
+        :type command: str
+        :param timeout: Timeout for command execution on each remote (counted from command start on remote).
+        :type timeout: typing.Union[int, float, None]
+        :param max_workers: Maximum amount of remotes processed simultaneously. 32 (all if multiplexed) by default.
+        :type max_workers: typing.Optional[int]
+        :param global_timeout: Timeout for the whole call. Remotes not completed in time are reported as timed out.
+        :type global_timeout: typing.Union[int, float, None]
+        :param multiplexed: Drive all channels from the current thread using selector instead of thread pool.
+        :type multiplexed: bool
+        :return: generator of ((hostname, port), result or raised exception)
+        :rtype: typing.Iterator[typing.Tuple[typing.Tuple[str, int], typing.Union[ExecResult, Exception]]]
+
+        Exit codes are not checked. If generator is closed before the end,
+        not started remotes are skipped and channels on running remotes are closed.
+        Output is drained while command is running. Results are queued to result_store of remote if set.
+
+        .. versionadded:: 2.1.0
+        """
+        if multiplexed:
+            return _ssh_reactor.execute_multiplexed(
+                remotes,
+                command,
+                timeout=timeout,
+                max_channels=max_workers,
+                global_timeout=global_timeout,
+                **kwargs
+            )
+        return cls.__execute_together_pooled(
+            remotes,
+            command,
+            timeout=timeout,
+            max_workers=max_workers,
+            global_timeout=global_timeout,
+            **kwargs
+        )
+
+    @classmethod
+    def __execute_together_pooled(
+        cls,
+        remotes: typing.Iterable['SSHClientBase'],
+        command: str,
+        timeout: typing.Union[int, float, None],
+        max_workers: typing.Optional[int] = None,
+        global_timeout: typing.Union[int, float, None] = None,
+        **kwargs: typing.Any
+    ) -> typing.Iterator[
+        typing.Tuple[typing.Tuple[str, int], typing.Union[exec_result.ExecResult, Exception]]
+    ]:
+        """Execute command on multiple remotes using thread pool: worker thread per running remote.
+
+        .. versionadded:: 2.1.0
+        """
+        deadline = time.monotonic() + global_timeout if global_timeout is not None else None
+        channels = set()  # type: typing.Set[paramiko.Channel]
+        channels_lock = threading.Lock()
+        aborted = threading.Event()
+        concurrency = governor.get_governor()
+
+        def not_started(remote: 'SSHClientBase') -> exceptions.ExecHelperTimeoutError:
+            """Timeout error for remote not started before global timeout."""
+            # pylint: disable=protected-access
+            cmd_for_log = remote._mask_command(
+                cmd=command,
+                log_mask_re=kwargs.get('log_mask_re', None)
+            )
+            # pylint: enable=protected-access
+            return exceptions.ExecHelperTimeoutError(
+                result=exec_result.ExecResult(cmd=cmd_for_log),
+                timeout=global_timeout  # type: ignore
+            )
+
+        def remaining_time(remote: 'SSHClientBase') -> typing.Optional[float]:
+            """Time left till global deadline, None if not limited."""
+            if deadline is None:
+                return None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise not_started(remote)
+            return remaining
+
         def get_result(remote: 'SSHClientBase') -> exec_result.ExecResult:
-            """Get result from remote call."""
+            """Get result from remote call: wait for governor slot not longer than global timeout."""
+            key = remote._governor_key  # pylint: disable=protected-access
+            if not concurrency.acquire(key, timeout=remaining_time(remote)):
+                raise not_started(remote)
+            try:
+                return get_result_unlimited(remote)
+            finally:
+                concurrency.release(key)
+
+        def get_result_unlimited(remote: 'SSHClientBase') -> exec_result.ExecResult:
+            """Get result from remote call without governor."""
+            # pylint: disable=protected-access
+            cmd_for_log = remote._mask_command(
+                cmd=command,
+                log_mask_re=kwargs.get('log_mask_re', None)
+            )
+            # pylint: enable=protected-access
+
+            wait_timeout = timeout
+            remaining = remaining_time(remote)
+            if remaining is not None and (wait_timeout is None or remaining < wait_timeout):
+                wait_timeout = remaining
+
             (
                 chan,
                 _,
@@ -872,54 +1191,155 @@ class SSHClientBase(api.ExecHelper, metaclass=_MemorizedSSH):
                 **kwargs
             )  # type: _type_execute_async
 
-            chan.status_event.wait(timeout)
-            exit_code = chan.recv_exit_status()
+            with channels_lock:
+                channels.add(chan)
+            if aborted.is_set():  # Consumer gone while channel was opening
+                chan.close()
 
-            # pylint: disable=protected-access
-            cmd_for_log = remote._mask_command(
-                cmd=command,
-                log_mask_re=kwargs.get('log_mask_re', None)
+            result = remote._make_result(cmd_for_log, **kwargs)  # pylint: disable=protected-access
+
+            # Drain output while command is running: remote is not blocked by closed SSH window
+            reader = _ssh_channel.ChannelReader(
+                chan,
+                read_stdout=stdout is not None,
+                read_stderr=stderr is not None,
             )
-            # pylint: enable=protected-access
+            try:
+                reader.read_all_to(result, timeout=wait_timeout)
+                result.exit_code = chan.recv_exit_status()
+                remote._store_result(result)  # pylint: disable=protected-access
+                return result
+            finally:
+                chan.close()
+                with channels_lock:
+                    channels.discard(chan)
+
+        targets = set(remotes)  # Use distinct remotes
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or max(min(len(targets), constants.DEFAULT_MAX_WORKERS), 1)
+        ) as executor:
+            futures = {
+                executor.submit(get_result, remote): remote for remote in targets
+            }  # type: typing.Dict[concurrent.futures.Future, SSHClientBase]
 
-            result = exec_result.ExecResult(cmd=cmd_for_log)
-            result.read_stdout(src=stdout)
-            result.read_stderr(src=stderr)
-            result.exit_code = exit_code
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    remote = futures[future]
+                    try:
+                        result = future.result()  # type: typing.Union[exec_result.ExecResult, Exception]
+                    except Exception as e:
+                        result = e
+                    yield (remote.hostname, remote.port), result
+            finally:
+                aborted.set()
+                for future in futures:
+                    future.cancel()
+                with channels_lock:
+                    for chan in channels:
+                        chan.close()
 
-            chan.close()
-            return result
+    @classmethod
+    def execute_together(
+        cls,
+        remotes: typing.Iterable['SSHClientBase'],
+        command: str,
+        timeout: typing.Union[int, float, None] = constants.DEFAULT_TIMEOUT,
+        expected: typing.Optional[typing.Iterable[int]] = None,
+        raise_on_err: bool = True,
+        max_workers: typing.Optional[int] = None,
+        global_timeout: typing.Union[int, float, None] = None,
+        multiplexed: bool = False,
+        batch_size: typing.Union[int, float, None] = None,
+        canary: int = 0,
+        max_failure_ratio: typing.Optional[float] = None,
+        dedup: bool = False,
+        **kwargs: typing.Any
+    ) -> typing.Dict[typing.Tuple[str, int], exec_result.ExecResult]:
+        """Execute command on multiple remotes in async mode.
 
+        :param remotes: Connections to execute on
+        :type remotes: typing.Iterable[SSHClientBase]
+        :param command: Command for execution
+        :type command: str
+        :param timeout: Timeout for command execution on each remote (counted from command start on remote).
+        :type timeout: typing.Union[int, float, None]
+        :param expected: expected return codes (0 by default)
+        :type expected: typing.Optional[typing.Iterable[]]
+        :param raise_on_err: Raise exception on unexpected return code
+        :type raise_on_err: bool
+        :param max_workers: Maximum amount of remotes processed simultaneously. 32 (all if multiplexed) by default.
+        :type max_workers: typing.Optional[int]
+        :param global_timeout: Timeout for the whole call. Remotes not completed in time are reported as timed out.
+        :type global_timeout: typing.Union[int, float, None]
+        :param multiplexed: Drive all channels from the current thread using selector instead of thread pool.
+        :type multiplexed: bool
+        :param batch_size: Rolling mode: amount of remotes per batch (int) or fraction of all remotes (float).
+        :type batch_size: typing.Union[int, float, None]
+        :param canary: Rolling mode: amount of remotes in the first batch. Any failure on it aborts execution.
+        :type canary: int
+        :param max_failure_ratio: Rolling mode: abort remaining batches if failed/processed ratio exceeds value.
+        :type max_failure_ratio: typing.Optional[float]
+        :param dedup: Share storage of identical output between results after completion.
+        :type dedup: bool
+        :return: dictionary {(hostname, port): result}
+        :rtype: typing.Dict[typing.Tuple[str, int], exec_result.ExecResult]
+        :raises ParallelCallProcessError: Unexpected any code at lest on one target or execution aborted
+        :raises ParallelCallExceptions: At lest one exception raised during execution (including timeout)
+
+        .. versionchanged:: 1.2.0 default timeout 1 hour
+        .. versionchanged:: 1.2.0 log_mask_re regex rule for masking cmd
+        .. versionchanged:: 2.1.0 max_workers and global_timeout, dedicated thread pool, timeout is per remote
+        .. versionchanged:: 2.1.0 multiplexed execution
+        .. versionchanged:: 2.1.0 rolling mode: batch_size, canary and max_failure_ratio
+        .. versionchanged:: 2.1.0 output deduplication
+
+        Failures (exceptions and unexpected exit codes) are checked after each batch.
+        If execution is aborted, ParallelCallProcessError is raised regardless of raise_on_err
+        (ParallelCallExceptions if exceptions raised) with not started remotes in `skipped`.
+        """
         expected = expected or [proc_enums.ExitCodes.EX_OK]
         expected = proc_enums.exit_codes_to_enums(expected)
 
-        futures = {remote: get_result(remote) for remote in set(remotes)}  # Use distinct remotes
         results = {}
         errors = {}
         raised_exceptions = {}
+        skipped = []  # type: typing.List[typing.Tuple[str, int]]
 
-        (
-            _,
-            not_done,
-        ) = concurrent.futures.wait(
-            list(futures.values()),
-            timeout=timeout
-        )  # type: typing.Set[concurrent.futures.Future], typing.Set[concurrent.futures.Future]
+        deadline = time.monotonic() + global_timeout if global_timeout is not None else None
+        processed = 0
+        aborted = False
+        interner = _output_interner.OutputInterner() if dedup else None
 
-        for future in not_done:  # pragma: no cover
-            future.cancel()
+        for batch_idx, batch in enumerate(cls.__split_batches(remotes, batch_size=batch_size, canary=canary)):
+            if aborted:
+                skipped.extend((remote.hostname, remote.port) for remote in batch)
+                continue
 
-        for (
-            remote,
-            future,  # type: ignore
-        ) in futures.items():  # type: SSHClientBase, concurrent.futures.Future
-            try:
-                result = future.result()
-                results[(remote.hostname, remote.port)] = result
+            for key, result in cls.execute_together_iter(
+                batch,
+                command,
+                timeout=timeout,
+                max_workers=max_workers,
+                global_timeout=max(deadline - time.monotonic(), 0) if deadline is not None else None,
+                multiplexed=multiplexed,
+                **kwargs
+            ):
+                processed += 1
+                if isinstance(result, Exception):
+                    raised_exceptions[key] = result
+                    continue
+                if interner is not None:
+                    interner.intern(result)
+                results[key] = result
                 if result.exit_code not in expected:
-                    errors[(remote.hostname, remote.port)] = result
-            except Exception as e:
-                raised_exceptions[(remote.hostname, remote.port)] = e
+                    errors[key] = result
+
+            failed = len(raised_exceptions) + len(errors)
+            if canary and batch_idx == 0:
+                aborted = failed > 0
+            elif max_failure_ratio is not None:
+                aborted = failed > max_failure_ratio * processed
 
         if raised_exceptions:  # always raise
             raise exceptions.ParallelCallExceptions(
@@ -927,14 +1347,67 @@ class SSHClientBase(api.ExecHelper, metaclass=_MemorizedSSH):
                 raised_exceptions,
                 errors,
                 results,
-                expected=expected
+                expected=expected,
+                skipped=skipped
             )
-        if errors and raise_on_err:
+        if errors and (raise_on_err or skipped):
             raise exceptions.ParallelCallProcessError(
-                command, errors, results, expected=expected
+                command, errors, results, expected=expected, skipped=skipped
             )
         return results
 
+    @staticmethod
+    def group_by_output(
+        results: typing.Dict[typing.Tuple[str, int], exec_result.ExecResult]
+    ) -> typing.Dict[str, typing.List[typing.Tuple[str, int]]]:
+        """Group remotes by identical result: exit code, stdout and stderr.
+
+        :param results: dictionary {(hostname, port): result}
+        :type results: typing.Dict[typing.Tuple[str, int], ExecResult]
+        :return: dictionary {digest: [(hostname, port), ...]}
+        :rtype: typing.Dict[str, typing.List[typing.Tuple[str, int]]]
+
+        Digest is calculated once per shared output for results from `execute_together(..., dedup=True)`.
+
+        .. versionadded:: 2.1.0
+        """
+        return _output_interner.group_by_output(results)
+
+    @staticmethod
+    def __split_batches(
+        remotes: typing.Iterable['SSHClientBase'],
+        batch_size: typing.Union[int, float, None],
+        canary: int,
+    ) -> typing.List[typing.List['SSHClientBase']]:
+        """Split distinct remotes to batches for rolling execution.
+
+        :param remotes: Connections to execute on
+        :type remotes: typing.Iterable[SSHClientBase]
+        :param batch_size: amount of remotes per batch (int) or fraction of all remotes (float). All at once if None.
+        :type batch_size: typing.Union[int, float, None]
+        :param canary: amount of remotes in the first batch
+        :type canary: int
+        :rtype: typing.List[typing.List[SSHClientBase]]
+        :raises ValueError: incorrect batch_size or canary
+        """
+        ordered = list(collections.OrderedDict.fromkeys(remotes))  # Use distinct remotes, keep order
+        if canary < 0:
+            raise ValueError('canary should be non-negative, got {!r}'.format(canary))
+        if batch_size is None:
+            size = len(ordered)
+        elif isinstance(batch_size, float):
+            if not 0 < batch_size <= 1:
+                raise ValueError('batch_size fraction should be in range (0, 1], got {!r}'.format(batch_size))
+            size = int(math.ceil(len(ordered) * batch_size))
+        elif batch_size > 0:
+            size = batch_size
+        else:
+            raise ValueError('batch_size should be positive, got {!r}'.format(batch_size))
+
+        batches = [ordered[:canary]] if canary else []
+        batches.extend(ordered[start:start + size] for start in range(canary, len(ordered), max(size, 1)))
+        return batches
+
     def open(self, path: str, mode: str = 'r') -> paramiko.SFTPFile:
         """Open file on remote using SFTP session.
 
@@ -0,0 +1,236 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Single thread multiplexed execution on many SSH connections.
+
+.. versionadded:: 2.1.0
+"""
+
+import collections
+import selectors
+import time
+import typing
+
+import paramiko  # type: ignore
+
+from exec_helpers import exceptions
+from exec_helpers import exec_result
+from exec_helpers import governor
+from exec_helpers import result_store
+from exec_helpers import _ssh_channel
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from exec_helpers import _ssh_client_base  # noqa: F401  # pylint: disable=cyclic-import
+
+__all__ = ('execute_multiplexed', )
+
+# Maximum amount of commands started between polls: started channels are drained while others are dispatched
+_DISPATCH_BATCH = 8
+
+_type_multiplexed_result = typing.Tuple[typing.Tuple[str, int], typing.Union[exec_result.ExecResult, Exception]]
+
+
+class _Task:
+    """Command running on remote."""
+
+    __slots__ = (
+        'key',
+        'reader',
+        'result',
+        'timeout',
+        'deadline',
+        'store',
+    )
+
+    def __init__(
+        self,
+        key: typing.Tuple[str, int],
+        channel: paramiko.Channel,
+        read_stdout: bool,
+        read_stderr: bool,
+        result: exec_result.ExecResult,
+        timeout: typing.Union[int, float, None],
+        store: typing.Optional[result_store.ResultStore] = None,
+    ) -> None:
+        """Command running on remote.
+
+        :param key: remote (hostname, port)
+        :type key: typing.Tuple[str, int]
+        :param channel: channel with executed command
+        :type channel: paramiko.Channel
+        :param read_stdout: collect STDOUT
+        :type read_stdout: bool
+        :param read_stderr: collect STDERR
+        :type read_stderr: bool
+        :param result: target execution result
+        :type result: ExecResult
+        :param timeout: Timeout for command execution
+        :type timeout: typing.Union[int, float, None]
+        :param store: storage for finished result
+        :type store: typing.Optional[ResultStore]
+        """
+        self.key = key
+        self.reader = _ssh_channel.ChannelReader(channel, read_stdout=read_stdout, read_stderr=read_stderr)
+        self.result = result
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.store = store
+
+    def poll(self, now: float) -> typing.Union[exec_result.ExecResult, Exception, None]:
+        """Read available output and check for completion.
+
+        :return: result or exception if task is completed, else None
+        :rtype: typing.Union[ExecResult, Exception, None]
+        """
+        try:
+            done = self.reader.exit_status_ready
+            self.reader.read_to(self.result, final=done)
+            if done:
+                self.result.exit_code = self.reader.channel.recv_exit_status()
+                if self.store is not None:
+                    self.store.put(self.key, self.result)
+                return self.result
+            if self.deadline is not None and now >= self.deadline:
+                return exceptions.ExecHelperTimeoutError(result=self.result, timeout=self.timeout)  # type: ignore
+        except Exception as e:
+            return e
+        return None
+
+
+def execute_multiplexed(
+    remotes: typing.Iterable['_ssh_client_base.SSHClientBase'],
+    command: str,
+    timeout: typing.Union[int, float, None],
+    max_channels: typing.Optional[int] = None,
+    global_timeout: typing.Union[int, float, None] = None,
+    **kwargs: typing.Any
+) -> typing.Iterator[_type_multiplexed_result]:
+    """Execute command on multiple remotes from the current thread and produce results in order of completion.
+
+    :param remotes: Connections to execute on
+    :type remotes: typing.Iterable[SSHClientBase]
+    :param command: Command for execution
+    :type command: str
+    :param timeout: Timeout for command execution on each remote (counted from command start on remote).
+    :type timeout: typing.Union[int, float, None]
+    :param max_channels: Maximum amount of channels opened simultaneously. All remotes at once by default.
+    :type max_channels: typing.Optional[int]
+    :param global_timeout: Timeout for the whole call. Remotes not completed in time are reported as timed out.
+    :type global_timeout: typing.Union[int, float, None]
+    :return: generator of ((hostname, port), result or raised exception)
+    :rtype: typing.Iterator[typing.Tuple[typing.Tuple[str, int], typing.Union[ExecResult, Exception]]]
+
+    All channels are multiplexed by one selector: no thread is used per remote or per channel.
+    Commands are started in small batches: output of started channels is read between batches.
+    Each channel uses 2 file descriptors for the readiness notification pipe.
+    """
+    global_deadline = time.monotonic() + global_timeout if global_timeout is not None else None
+    pending = collections.deque(set(remotes))  # Use distinct remotes
+    active = {}  # type: typing.Dict[paramiko.Channel, _Task]
+    selector = selectors.DefaultSelector()
+    concurrency = governor.get_governor()
+
+    def finish(task: _Task) -> None:
+        """Stop watching channel, close it and release governor slot."""
+        selector.unregister(task.reader.channel)
+        del active[task.reader.channel]
+        try:
+            task.reader.channel.close()
+        finally:
+            concurrency.release(task.key)
+
+    try:
+        last_sweep = time.monotonic()
+        while pending or active:
+            saturated = collections.deque()  # Remotes without free governor slot: retry on the next loop
+            started = 0
+            while pending and started < _DISPATCH_BATCH and (max_channels is None or len(active) < max_channels):
+                remote = pending.popleft()
+                key = (remote.hostname, remote.port)
+                # pylint: disable=protected-access
+                cmd_for_log = remote._mask_command(
+                    cmd=command,
+                    log_mask_re=kwargs.get('log_mask_re', None)
+                )
+                # pylint: enable=protected-access
+
+                wait_timeout = timeout
+                if global_deadline is not None:
+                    remaining = global_deadline - time.monotonic()
+                    if remaining <= 0:  # Not started before global timeout
+                        yield key, exceptions.ExecHelperTimeoutError(
+                            result=exec_result.ExecResult(cmd=cmd_for_log),
+                            timeout=global_timeout  # type: ignore
+                        )
+                        continue
+                    if wait_timeout is None or remaining < wait_timeout:
+                        wait_timeout = remaining
+
+                if not concurrency.try_acquire(key):  # Do not block dispatch to other hosts
+                    saturated.append(remote)
+                    continue
+                started += 1
+                chan = None
+                try:
+                    (
+                        chan,
+                        _,
+                        stderr,
+                        stdout,
+                    ) = remote.execute_async(
+                        command,
+                        **kwargs
+                    )
+                    task = _Task(
+                        key=key,
+                        channel=chan,
+                        read_stdout=stdout is not None,
+                        read_stderr=stderr is not None,
+                        result=remote._make_result(cmd_for_log, **kwargs),  # pylint: disable=protected-access
+                        timeout=wait_timeout,
+                        store=remote.result_store,
+                    )
+                    selector.register(chan, selectors.EVENT_READ, task)
+                except Exception as e:
+                    if chan is not None:
+                        chan.close()
+                    concurrency.release(key)
+                    yield key, e
+                    continue
+                active[chan] = task
+            pending.extendleft(reversed(saturated))
+            batch_full = started >= _DISPATCH_BATCH  # Do not wait for output: continue dispatch after poll
+
+            if not active:
+                if not batch_full:
+                    time.sleep(_ssh_channel.POLL_INTERVAL)  # Waiting for governor
+                continue
+
+            ready = selector.select(0 if batch_full else _ssh_channel.POLL_INTERVAL)
+            candidates = [selector_key.data for selector_key, _ in ready]
+            now = time.monotonic()
+            if now - last_sweep >= _ssh_channel.POLL_INTERVAL:
+                # Exit status and timeouts do not trigger channel pipe: check all channels
+                candidates = list(active.values())
+                last_sweep = now
+
+            for task in candidates:
+                outcome = task.poll(now)
+                if outcome is not None:
+                    finish(task)
+                    yield task.key, outcome
+    finally:
+        for task in list(active.values()):
+            finish(task)
+        selector.close()
@@ -28,8 +28,13 @@ import typing
 from exec_helpers import constants
 from exec_helpers import exceptions
 from exec_helpers import exec_result
+from exec_helpers import exec_stream
+from exec_helpers import governor
 from exec_helpers import proc_enums
 
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from exec_helpers import result_store  # noqa: F401
+
 
 class ExecHelper(metaclass=abc.ABCMeta):
     """ExecHelper global API."""
@@ -37,7 +42,8 @@ class ExecHelper(metaclass=abc.ABCMeta):
     __slots__ = (
         '__lock',
         '__logger',
-        'log_mask_re'
+        'log_mask_re',
+        'result_store',
     )
 
     def __init__(
@@ -53,10 +59,12 @@ class ExecHelper(metaclass=abc.ABCMeta):
 
         .. versionchanged:: 1.2.0 log_mask_re regex rule for masking cmd
         .. versionchanged:: 1.3.5 make API public to use as interface
+        .. versionchanged:: 2.1.0 result_store attribute for persistent results storage
         """
         self.__lock = threading.RLock()
         self.__logger = logger
         self.log_mask_re = log_mask_re
+        self.result_store = None  # type: typing.Optional['result_store.ResultStore']
 
     @property
     def logger(self) -> logging.Logger:
@@ -71,6 +79,44 @@ class ExecHelper(metaclass=abc.ABCMeta):
         """
         return self.__lock
 
+    @property
+    def _governor_key(self) -> typing.Hashable:
+        """Target host identifier for per-host limits of concurrency governor.
+
+        :rtype: typing.Hashable
+
+        .. versionadded:: 2.1.0
+        """
+        return 'localhost'
+
+    def _make_result(self, cmd: str, **kwargs: typing.Any) -> exec_result.ExecResult:
+        """Create result for command output with storage options from execution kwargs.
+
+        :param cmd: command for result (masked)
+        :type cmd: str
+        :rtype: ExecResult
+
+        Used options: spill_threshold, capture_head, capture_tail, capture_filter, encoding.
+
+        .. versionadded:: 2.1.0
+        """
+        return exec_result.ExecResult(
+            cmd=cmd,
+            spill_threshold=kwargs.get('spill_threshold', constants.DEFAULT_SPILL_THRESHOLD),
+            capture_head=kwargs.get('capture_head', None),
+            capture_tail=kwargs.get('capture_tail', None),
+            capture_filter=kwargs.get('capture_filter', None),
+            encoding=kwargs.get('encoding', 'utf-8'),
+        )
+
+    def _store_result(self, result: exec_result.ExecResult) -> None:
+        """Queue result for storage if result_store is set.
+
+        .. versionadded:: 2.1.0
+        """
+        if self.result_store is not None:
+            self.result_store.put(self._governor_key, result)
+
     def __enter__(self) -> 'ExecHelper':
         """Get context manager.
 
@@ -196,6 +242,57 @@ class ExecHelper(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def _stream_command(
+        self,
+        command: str,
+        interface: typing.Any,
+        stdout: typing.Any,
+        stderr: typing.Any,
+        timeout: typing.Union[int, float, None],
+        verbose: bool = False,
+        log_mask_re: typing.Optional[str] = None,
+        **kwargs: typing.Any
+    ) -> typing.Generator[typing.Tuple[str, bytes], None, typing.Union[int, proc_enums.ExitCodes]]:
+        """Get output lines from interface as they arrive and return exit code.
+
+        :param command: Command for execution
+        :type command: str
+        :param interface: Control interface
+        :type interface: typing.Any
+        :param stdout: STDOUT pipe or file-like object
+        :type stdout: typing.Any
+        :param stderr: STDERR pipe or file-like object
+        :type stderr: typing.Any
+        :param timeout: Timeout for command execution
+        :type timeout: typing.Union[int, float, None]
+        :param verbose: produce verbose log record on command call
+        :type verbose: bool
+        :param log_mask_re: regex lookup rule to mask command for logger.
+                            all MATCHED groups will be replaced by '<*masked*>'
+        :type log_mask_re: typing.Optional[str]
+        :return: generator of (stream name, line). Exit code is returned on stop.
+        :rtype: typing.Generator[typing.Tuple[str, bytes], None, typing.Union[int, proc_enums.ExitCodes]]
+        :raises ExecHelperTimeoutError: Timeout exceeded
+
+        .. note:: not abstract for backward compatibility with existing implementations.
+        .. versionadded:: 2.1.0
+        """
+        raise NotImplementedError(
+            '{cls} does not support streamed execution'.format(cls=self.__class__.__name__)
+        )  # pragma: no cover
+
+    def _stop_command(self, interface: typing.Any) -> None:
+        """Stop command started by execute_async, if it is still running, and release its interface.
+
+        :param interface: Control interface
+        :type interface: typing.Any
+
+        .. versionadded:: 2.1.0
+        """
+        raise NotImplementedError(
+            '{cls} does not support streamed execution'.format(cls=self.__class__.__name__)
+        )  # pragma: no cover
+
     def execute(
         self,
         command: str,
@@ -215,8 +312,11 @@ class ExecHelper(metaclass=abc.ABCMeta):
         :raises ExecHelperTimeoutError: Timeout exceeded
 
         .. versionchanged:: 1.2.0 default timeout 1 hour
+        .. versionchanged:: 2.1.0 slot is acquired from concurrency governor
+        .. versionchanged:: 2.1.0 result is queued to result_store if set
         """
-        with self.lock:
+        # Slot is acquired before lock: other users of helper are not blocked while waiting for slot
+        with governor.get_governor().slot(self._governor_key), self.lock:
             (
                 iface,
                 _,
@@ -242,8 +342,81 @@ class ExecHelper(metaclass=abc.ABCMeta):
                 level=logging.INFO if verbose else logging.DEBUG,
                 msg=message
             )
+            self._store_result(result)
             return result
 
+    def execute_stream(
+        self,
+        command: str,
+        verbose: bool = False,
+        timeout: typing.Union[int, float, None] = constants.DEFAULT_TIMEOUT,
+        **kwargs: typing.Any
+    ) -> exec_stream.ExecStream:
+        """Execute command and iterate over output lines as they arrive.
+
+        :param command: Command for execution
+        :type command: str
+        :param verbose: Produce log.info records for command call and output
+        :type verbose: bool
+        :param timeout: Timeout for command execution.
+        :type timeout: typing.Union[int, float, None]
+        :return: iterator over (stream name, line) with exit code available after the last line
+        :rtype: ExecStream
+        :raises ExecHelperTimeoutError: Timeout exceeded (during iteration)
+
+        Output is not collected, so memory usage does not depend on output size.
+        Lock is held while command is starting, governor slot - until stream is closed.
+        Stream is closed on exhaustion, error, close() or garbage collection: command is stopped on close.
+
+        .. versionadded:: 2.1.0
+        """
+        concurrency = governor.get_governor()
+        governor_key = self._governor_key
+
+        concurrency.acquire(governor_key)  # Slot is acquired before lock: see execute()
+        try:
+            with self.lock:
+                (
+                    iface,
+                    _,
+                    stderr,
+                    stdout,
+                ) = self.execute_async(
+                    command,
+                    verbose=verbose,
+                    **kwargs
+                )
+        except BaseException:
+            concurrency.release(governor_key)
+            raise
+
+        def on_close() -> None:
+            """Stop command and release governor slot."""
+            try:
+                self._stop_command(iface)
+            finally:
+                concurrency.release(governor_key)
+
+        try:
+            source = self._stream_command(
+                command=command,
+                interface=iface,
+                stdout=stdout,
+                stderr=stderr,
+                timeout=timeout,
+                verbose=verbose,
+                **kwargs
+            )
+        except BaseException:
+            on_close()
+            raise
+
+        return exec_stream.ExecStream(
+            cmd=self._mask_command(cmd=command, log_mask_re=kwargs.get('log_mask_re', None)),
+            source=source,
+            on_close=on_close,
+        )
+
     def check_call(
         self,
         command: str,
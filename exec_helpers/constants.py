@@ -17,6 +17,14 @@
 MINUTE = 60
 HOUR = 60 * MINUTE
 
+MEGABYTE = 1024 * 1024
+
 
 # Default command timeout
 DEFAULT_TIMEOUT = 1 * HOUR
+
+# Default amount of remotes processed simultaneously by thread pool
+DEFAULT_MAX_WORKERS = 32
+
+# Output size to move execution result data to temporary file
+DEFAULT_SPILL_THRESHOLD = 64 * MEGABYTE
@@ -32,6 +32,16 @@ __all__ = (
 )
 
 
+def _format_target(target: typing.Any) -> str:
+    """Format target of parallel call for message: (hostname, port) or any other key.
+
+    .. versionadded:: 2.1.0
+    """
+    if isinstance(target, tuple) and len(target) == 2:
+        return '{}:{}'.format(*target)
+    return '{}'.format(target)
+
+
 class ExecHelperError(Exception):
     """Base class for all exceptions raised inside."""
 
@@ -164,7 +174,8 @@ class ParallelCallExceptions(ExecCalledProcessError):
         'exceptions',
         'errors',
         'results',
-        'expected'
+        'expected',
+        'skipped',
     )
 
     def __init__(
@@ -174,6 +185,7 @@ class ParallelCallExceptions(ExecCalledProcessError):
         errors: typing.Dict[typing.Tuple[str, int], 'exec_result.ExecResult'],
         results: typing.Dict[typing.Tuple[str, int], 'exec_result.ExecResult'],
         expected: typing.Optional[typing.List[typing.Union[int, proc_enums.ExitCodes]]] = None,
+        skipped: typing.Optional[typing.Iterable[typing.Tuple[str, int]]] = None,
     ) -> None:
         """Exception raised during parallel call as result of exceptions.
 
@@ -187,6 +199,10 @@ class ParallelCallExceptions(ExecCalledProcessError):
         :type results: typing.Dict[typing.Tuple[str, int], ExecResult]
         :param expected: expected return codes
         :type expected: typing.Optional[typing.List[typing.Union[int, proc_enums.ExitCodes]]]
+        :param skipped: remotes, where command was not started due to abort
+        :type skipped: typing.Optional[typing.Iterable[typing.Tuple[str, int]]]
+
+        .. versionchanged:: 2.1.0 skipped remotes
         """
         expected = expected or [proc_enums.ExitCodes.EX_OK]
         self.expected = proc_enums.exit_codes_to_enums(expected)
@@ -194,19 +210,22 @@ class ParallelCallExceptions(ExecCalledProcessError):
         self.exceptions = exceptions
         self.errors = errors
         self.results = results
+        self.skipped = tuple(skipped or ())
         message = (
             "Command {self.cmd!r} "
             "during execution raised exceptions: \n"
             "\t{exceptions}".format(
                 self=self,
                 exceptions="\n\t".join(
-                    "{host}:{port} - {exc} ".format(
-                        host=host, port=port, exc=exc
+                    "{target} - {exc} ".format(
+                        target=_format_target(target), exc=exc
                     )
-                    for (host, port), exc in exceptions.items()
+                    for target, exc in exceptions.items()
                 )
             )
         )
+        if self.skipped:
+            message += "\nSkipped {count} remotes due to abort".format(count=len(self.skipped))
         super(ParallelCallExceptions, self).__init__(message)
 
 
@@ -217,7 +236,8 @@ class ParallelCallProcessError(ExecCalledProcessError):
         'cmd',
         'errors',
         'results',
-        'expected'
+        'expected',
+        'skipped',
     )
 
     def __init__(
@@ -226,6 +246,7 @@ class ParallelCallProcessError(ExecCalledProcessError):
         errors: typing.Dict[typing.Tuple[str, int], 'exec_result.ExecResult'],
         results: typing.Dict[typing.Tuple[str, int], 'exec_result.ExecResult'],
         expected: typing.Optional[typing.List[typing.Union[int, proc_enums.ExitCodes]]] = None,
+        skipped: typing.Optional[typing.Iterable[typing.Tuple[str, int]]] = None,
     ) -> None:
         """Exception during parallel execution.
 
@@ -237,12 +258,17 @@ class ParallelCallProcessError(ExecCalledProcessError):
         :type results: typing.Dict[typing.Tuple[str, int], ExecResult]
         :param expected: expected return codes
         :type expected: typing.Optional[typing.List[typing.Union[int, proc_enums.ExitCodes]]]
+        :param skipped: remotes, where command was not started due to abort
+        :type skipped: typing.Optional[typing.Iterable[typing.Tuple[str, int]]]
+
+        .. versionchanged:: 2.1.0 skipped remotes
         """
         expected = expected or [proc_enums.ExitCodes.EX_OK]
         self.expected = proc_enums.exit_codes_to_enums(expected)
         self.cmd = command
         self.errors = errors
         self.results = results
+        self.skipped = tuple(skipped or ())
         message = (
             "Command {self.cmd!r} "
             "returned unexpected exit codes on several hosts\n"
@@ -251,11 +277,13 @@ class ParallelCallProcessError(ExecCalledProcessError):
             "\t{errors}".format(
                 self=self,
                 errors="\n\t".join(
-                    "{host}:{port} - {code} ".format(
-                        host=host, port=port, code=result.exit_code
+                    "{target} - {code} ".format(
+                        target=_format_target(target), code=result.exit_code
                     )
-                    for (host, port), result in errors.items()
+                    for target, result in errors.items()
                 )
             )
         )
+        if self.skipped:
+            message += "\nSkipped {count} remotes due to abort".format(count=len(self.skipped))
         super(ParallelCallProcessError, self).__init__(message)
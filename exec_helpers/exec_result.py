@@ -16,29 +16,88 @@
 
 """Execution result."""
 
+import array
+import codecs
 import datetime
 import json
 import logging
+import struct
+import sys
 import threading
 import typing
 
 import yaml
 
+from exec_helpers import constants
 from exec_helpers import exceptions  # pylint: disable=cyclic-import
 from exec_helpers import proc_enums
+from exec_helpers import _output_buffer
 
 __all__ = ('ExecResult', )
 
 logger = logging.getLogger(__name__)
 
+# Whitespace stripped by bytes.strip()
+_ASCII_WHITESPACE = ' \t\n\r\x0b\x0c'
+
+# Amount of lines read under lock by iterators
+_ITER_BATCH = 1024
+
+# libyaml based loader is much faster, if available
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Binary serialization: magic, version, flags, exit code, timestamp (microseconds since epoch)
+_SERIAL_MAGIC = b'EXRS'
+_SERIAL_VERSION = 1
+_SERIAL_HEADER = struct.Struct('<4sBBqq')
+_SERIAL_SIZE = struct.Struct('<Q')
+_FLAG_STDIN = 0x01
+_FLAG_TIMESTAMP = 0x02
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def _restore(cls: typing.Type['ExecResult'], data: bytes) -> 'ExecResult':
+    """Restore execution result from binary format: pickle support."""
+    return cls.from_bytes(data)
+
+
+class _NoLock:
+    """Context manager without locking for immutable data access."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        """Nothing to lock."""
+
+    def __exit__(self, exc_type: typing.Any, exc_val: typing.Any, exc_tb: typing.Any) -> None:
+        """Nothing to release."""
+
+
+_NO_LOCK = _NoLock()
+
+# Attributes available via __getitem__
+_ATTRIBUTES = (
+    'cmd', 'stdout', 'stderr', 'exit_code',
+    'stdout_bin', 'stderr_bin', 'stdout_view', 'stderr_view',
+    'stdout_str', 'stderr_str', 'stdout_brief', 'stderr_brief',
+    'stdout_json', 'stdout_yaml',
+    'lock'
+)
+_ATTRIBUTES_SET = frozenset(_ATTRIBUTES)
+
 
 class ExecResult:
-    """Execution result."""
+    """Execution result.
+
+    After final exit code result is immutable and data is accessed without locking.
+    """
 
     __slots__ = [
         '__cmd', '__stdin', '__stdout', '__stderr', '__exit_code',
         '__timestamp',
         '__stdout_str', '__stderr_str', '__stdout_brief', '__stderr_brief',
+        '__stdout_parsed', '__digest',
         '__lock'
     ]
 
@@ -48,7 +107,12 @@ class ExecResult:
         stdin: typing.Union[bytes, str, bytearray, None] = None,
         stdout: typing.Optional[typing.Iterable[bytes]] = None,
         stderr: typing.Optional[typing.Iterable[bytes]] = None,
-        exit_code: typing.Union[int, proc_enums.ExitCodes] = proc_enums.ExitCodes.EX_INVALID
+        exit_code: typing.Union[int, proc_enums.ExitCodes] = proc_enums.ExitCodes.EX_INVALID,
+        spill_threshold: typing.Optional[int] = constants.DEFAULT_SPILL_THRESHOLD,
+        capture_head: typing.Optional[int] = None,
+        capture_tail: typing.Optional[int] = None,
+        encoding: str = 'utf-8',
+        capture_filter: typing.Union[typing.Pattern, typing.Callable[[bytes], bool], None] = None
     ) -> None:
         """Command execution result.
 
@@ -62,6 +126,24 @@ class ExecResult:
         :type stderr: typing.Optional[typing.Iterable[bytes]]
         :param exit_code: Exit code. If integer - try to convert to BASH enum.
         :type exit_code: typing.Union[int, proc_enums.ExitCodes]
+        :param spill_threshold: Output size in bytes to move stream data to temporary file. Never if None.
+        :type spill_threshold: typing.Optional[int]
+        :param capture_head: Amount of first lines to retain per stream. All lines if both limits are None.
+        :type capture_head: typing.Optional[int]
+        :param capture_tail: Amount of last lines to retain per stream. All lines if both limits are None.
+        :type capture_tail: typing.Optional[int]
+        :param encoding: STDOUT and STDERR encoding
+        :type encoding: str
+        :param capture_filter: Retain only matching lines: compiled regex (str patterns match decoded lines)
+                               or predicate for binary line.
+        :type capture_filter: typing.Union[typing.Pattern, typing.Callable[[bytes], bool], None]
+        :raises ValueError: capture limit is negative
+        :raises LookupError: unknown encoding
+
+        .. versionchanged:: 2.1.0 spill_threshold
+        .. versionchanged:: 2.1.0 capture_head and capture_tail
+        .. versionchanged:: 2.1.0 encoding
+        .. versionchanged:: 2.1.0 capture_filter
         """
         self.__lock = threading.RLock()
 
@@ -72,15 +154,22 @@ class ExecResult:
             stdin = self._get_str_from_bin(stdin)
         self.__stdin = stdin  # type: typing.Optional[str]
 
-        if stdout is not None:
-            self.__stdout = tuple(stdout)  # type: typing.Tuple[bytes, ...]
-        else:
-            self.__stdout = ()
-
-        if stderr is not None:
-            self.__stderr = tuple(stderr)  # type: typing.Tuple[bytes, ...]
-        else:
-            self.__stderr = ()
+        self.__stdout = _output_buffer.OutputBuffer(
+            stdout if stdout is not None else (),
+            spill_threshold=spill_threshold,
+            capture_head=capture_head,
+            capture_tail=capture_tail,
+            encoding=encoding,
+            capture_filter=capture_filter,
+        )
+        self.__stderr = _output_buffer.OutputBuffer(
+            stderr if stderr is not None else (),
+            spill_threshold=spill_threshold,
+            capture_head=capture_head,
+            capture_tail=capture_tail,
+            encoding=encoding,
+            capture_filter=capture_filter,
+        )
 
         self.__exit_code = proc_enums.ExitCodes.EX_INVALID  # type: typing.Union[int, proc_enums.ExitCodes]
         self.__timestamp = None
@@ -90,6 +179,8 @@ class ExecResult:
         self.__stdout_str = None
         self.__stderr_str = None
         self.__stdout_brief = None
+        self.__stdout_parsed = {}  # type: typing.Dict[str, typing.Any]
+        self.__digest = None  # type: typing.Optional[str]
         self.__stderr_brief = None
 
     @property
@@ -100,6 +191,12 @@ class ExecResult:
         """
         return self.__lock
 
+    def __guard(self) -> typing.Union[threading.RLock, _NoLock]:
+        """Lock for data access: not required after final exit code, when result is immutable."""
+        if self.__timestamp:
+            return _NO_LOCK
+        return self.__lock
+
     @property
     def timestamp(self) -> typing.Optional[datetime.datetime]:
         """Timestamp.
@@ -118,22 +215,28 @@ class ExecResult:
         return bytearray(b''.join(src))
 
     @staticmethod
-    def _get_str_from_bin(src: bytearray) -> str:
+    def _get_str_from_bin(src: typing.Union[bytes, bytearray, memoryview], encoding: str = 'utf-8') -> str:
         """Join data in list to the string.
 
-        :type src: bytearray
+        :type src: typing.Union[bytes, bytearray, memoryview]
+        :type encoding: str
         :rtype: str
+
+        .. versionchanged:: 2.1.0 any bytes-like object is accepted without copy
+        .. versionchanged:: 2.1.0 encoding
         """
-        return src.strip().decode(
-            encoding='utf-8',
+        return str(
+            src,
+            encoding=encoding,
             errors='backslashreplace'
-        )
+        ).strip(_ASCII_WHITESPACE)
 
     @classmethod
-    def _get_brief(cls, data: typing.Tuple[bytes, ...]) -> str:
+    def _get_brief(cls, data: typing.Tuple[bytes, ...], encoding: str = 'utf-8') -> str:
         """Get brief output: 7 lines maximum (3 first + ... + 3 last).
 
         :type data: typing.Tuple[bytes, ...]
+        :type encoding: str
         :rtype: str
         """
         if len(data) <= 7:
@@ -141,9 +244,20 @@ class ExecResult:
         else:
             src = data[:3] + (b'...\n',) + data[-3:]
         return cls._get_str_from_bin(
-            cls._get_bytearray_from_array(src)
+            cls._get_bytearray_from_array(src),
+            encoding=encoding
         )
 
+    @property
+    def encoding(self) -> str:
+        """STDOUT and STDERR encoding.
+
+        :rtype: str
+
+        .. versionadded:: 2.1.0
+        """
+        return self.__stdout.encoding
+
     @property
     def cmd(self) -> str:
         """Executed command.
@@ -165,16 +279,22 @@ class ExecResult:
         """Stdout output as list of binaries.
 
         :rtype: typing.Tuple[bytes, ...]
+
+        .. versionchanged:: 2.1.0 built on demand from compact internal storage and cached
         """
-        return self.__stdout
+        with self.__guard():
+            return self.__stdout.lines
 
     @property
     def stderr(self) -> typing.Tuple[bytes, ...]:
         """Stderr output as list of binaries.
 
         :rtype: typing.Tuple[bytes, ...]
+
+        .. versionchanged:: 2.1.0 built on demand from compact internal storage and cached
         """
-        return self.__stderr
+        with self.__guard():
+            return self.__stderr.lines
 
     @staticmethod
     def __poll_stream(
@@ -211,6 +331,7 @@ class ExecResult:
         :type verbose: bool
 
         .. versionchanged:: 1.2.0 - src can be None
+        .. versionchanged:: 2.1.0 - amortized O(1) append
         """
         if not src:
             return
@@ -219,7 +340,8 @@ class ExecResult:
 
         with self.lock:
             self.__stdout_str = self.__stdout_brief = None
-            self.__stdout += tuple(self.__poll_stream(src, log, verbose))
+            self.__stdout_parsed = {}
+            self.__stdout.extend(self.__poll_stream(src, log, verbose))
 
     def read_stderr(
         self,
@@ -237,6 +359,7 @@ class ExecResult:
         :type verbose: bool
 
         .. versionchanged:: 1.2.0 - src can be None
+        .. versionchanged:: 2.1.0 - amortized O(1) append
         """
         if not src:
             return
@@ -245,7 +368,118 @@ class ExecResult:
 
         with self.lock:
             self.__stderr_str = self.__stderr_brief = None
-            self.__stderr += tuple(self.__poll_stream(src, log, verbose))
+            self.__stderr.extend(self.__poll_stream(src, log, verbose))
+
+    def __get_buffer(self, stream: str) -> _output_buffer.OutputBuffer:
+        """Get output storage by stream name."""
+        if stream == 'stdout':
+            return self.__stdout
+        if stream == 'stderr':
+            return self.__stderr
+        raise ValueError('stream should be "stdout" or "stderr", got {!r}'.format(stream))
+
+    def iter_bytes(self, stream: str = 'stdout') -> typing.Iterator[bytes]:
+        """Iterate over stored output chunks as received (with line endings).
+
+        :param stream: "stdout" or "stderr"
+        :type stream: str
+        :return: generator of output chunks
+        :rtype: typing.Iterator[bytes]
+        :raises ValueError: unknown stream
+
+        Output is read in batches under lock: lines tuple, joined data and text are not built.
+
+        .. versionadded:: 2.1.0
+        """
+        with self.lock:
+            buffer = self.__get_buffer(stream)
+        start = 0
+        while True:
+            with self.__guard():
+                batch = buffer.get_lines(start, start + _ITER_BATCH)
+            if not batch:
+                return
+            for chunk in batch:
+                yield chunk
+            start += len(batch)
+
+    def iter_lines(self, stream: str = 'stdout', decode: bool = True) -> typing.Iterator[typing.Union[str, bytes]]:
+        """Iterate over output lines without line endings.
+
+        :param stream: "stdout" or "stderr"
+        :type stream: str
+        :param decode: decode lines to text using result encoding
+        :type decode: bool
+        :return: generator of lines
+        :rtype: typing.Iterator[typing.Union[str, bytes]]
+        :raises ValueError: unknown stream
+
+        .. versionadded:: 2.1.0
+        """
+        chunks = self.iter_bytes(stream)
+        if not decode:
+            for chunk in chunks:
+                yield chunk.rstrip(b'\r\n')
+            return
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors='backslashreplace')
+        line = None  # type: typing.Optional[str]
+        for chunk in chunks:  # Line is produced after the next one: incomplete code point is flushed to the last
+            if line is not None:
+                yield line.rstrip('\r\n')
+            line = decoder.decode(chunk)
+        rest = decoder.decode(b'', final=True)
+        if line is not None:
+            yield (line + rest).rstrip('\r\n')
+
+    def compact(self, method: str = 'zlib') -> None:
+        """Compress stored output of finished command.
+
+        :param method: compression method: "zlib" or "lzma"
+        :type method: str
+        :raises RuntimeError: Final exit code is not received
+        :raises ValueError: unknown compression method
+
+        Result stays fully usable: data is decompressed and decoded on access and not kept in memory.
+        Cached decoded text and deserialized data are released.
+
+        .. versionadded:: 2.1.0
+        """
+        with self.lock:
+            if not self.timestamp:
+                raise RuntimeError('Final exit code is not received.')
+            stdout = self.__stdout.compacted(method)
+            stderr = self.__stderr.compacted(method)
+            self.__stdout, self.__stderr = stdout, stderr
+            self.__stdout_str = self.__stderr_str = None
+            self.__stdout_parsed = {}
+
+    @property
+    def _output_buffers(self) -> typing.Tuple[_output_buffer.OutputBuffer, _output_buffer.OutputBuffer]:
+        """Internal STDOUT and STDERR storage.
+
+        :rtype: typing.Tuple[OutputBuffer, OutputBuffer]
+
+        .. versionadded:: 2.1.0
+        """
+        return self.__stdout, self.__stderr
+
+    def _set_shared_output(
+        self,
+        stdout: _output_buffer.OutputBuffer,
+        stderr: _output_buffer.OutputBuffer
+    ) -> None:
+        """Replace output storage by storage with equal data, shared with other results.
+
+        :param stdout: STDOUT storage, equal to current
+        :type stdout: OutputBuffer
+        :param stderr: STDERR storage, equal to current
+        :type stderr: OutputBuffer
+
+        .. versionadded:: 2.1.0
+        """
+        with self.lock:
+            self.__stdout = stdout
+            self.__stderr = stderr
 
     @property
     def stdout_bin(self) -> bytearray:
@@ -254,28 +488,66 @@ class ExecResult:
         Sometimes logging is used to log binary objects too (example: Session),
         and for debug purposes we can use this as data source.
         :rtype: bytearray
+
+        .. note:: mutable copy on each call, use stdout_view for read-only access to shared data
         """
-        with self.lock:
-            return self._get_bytearray_from_array(self.stdout)
+        with self.__guard():
+            return self.__stdout.to_bytearray()
 
     @property
     def stderr_bin(self) -> bytearray:
         """Stderr in binary format.
 
         :rtype: bytearray
+
+        .. note:: mutable copy on each call, use stderr_view for read-only access to shared data
         """
-        with self.lock:
-            return self._get_bytearray_from_array(self.stderr)
+        with self.__guard():
+            return self.__stderr.to_bytearray()
+
+    @property
+    def stdout_view(self) -> memoryview:
+        """Stdout in binary format: read-only view.
+
+        Data is joined once and cached until next read: in-memory output is copied once, not on each call.
+        After final exit code joined data replaces the growing buffer: no additional copy is kept.
+        :rtype: memoryview
+
+        .. versionadded:: 2.1.0
+        """
+        with self.__guard():
+            return self.__stdout.view()
+
+    @property
+    def stderr_view(self) -> memoryview:
+        """Stderr in binary format: read-only view.
+
+        Data is joined once and cached until next read: in-memory output is copied once, not on each call.
+        After final exit code joined data replaces the growing buffer: no additional copy is kept.
+        :rtype: memoryview
+
+        .. versionadded:: 2.1.0
+        """
+        with self.__guard():
+            return self.__stderr.view()
 
     @property
     def stdout_str(self) -> str:
         """Stdout output as string.
 
         :rtype: str
+
+        .. versionchanged:: 2.1.0 decoded incrementally: only data received since previous call is decoded
         """
+        cached = self.__stdout_str
+        if cached is not None and self.__timestamp:  # Frozen: cached value is final
+            return cached
         with self.lock:
             if self.__stdout_str is None:
-                self.__stdout_str = self._get_str_from_bin(self.stdout_bin)  # type: ignore
+                text = self.__stdout.text().strip(_ASCII_WHITESPACE)
+                if self.__stdout.compressed or self.__stdout.spilled:  # Decoded on demand: text is not kept in memory
+                    return text
+                self.__stdout_str = text
             return self.__stdout_str  # type: ignore
 
     @property
@@ -283,10 +555,18 @@ class ExecResult:
         """Stderr output as string.
 
         :rtype: str
+
+        .. versionchanged:: 2.1.0 decoded incrementally: only data received since previous call is decoded
         """
+        cached = self.__stderr_str
+        if cached is not None and self.__timestamp:  # Frozen: cached value is final
+            return cached
         with self.lock:
             if self.__stderr_str is None:
-                self.__stderr_str = self._get_str_from_bin(self.stderr_bin)  # type: ignore
+                text = self.__stderr.text().strip(_ASCII_WHITESPACE)
+                if self.__stderr.compressed or self.__stderr.spilled:  # Decoded on demand: text is not kept in memory
+                    return text
+                self.__stderr_str = text
             return self.__stderr_str  # type: ignore
 
     @property
@@ -295,9 +575,9 @@ class ExecResult:
 
         :rtype: str
         """
-        with self.lock:
+        with self.__guard():
             if self.__stdout_brief is None:
-                self.__stdout_brief = self._get_brief(self.stdout)  # type: ignore
+                self.__stdout_brief = self._get_brief(self.__stdout.brief_lines, self.encoding)  # type: ignore
             return self.__stdout_brief  # type: ignore
 
     @property
@@ -306,11 +586,33 @@ class ExecResult:
 
         :rtype: str
         """
-        with self.lock:
+        with self.__guard():
             if self.__stderr_brief is None:
-                self.__stderr_brief = self._get_brief(self.stderr)  # type: ignore
+                self.__stderr_brief = self._get_brief(self.__stderr.brief_lines, self.encoding)  # type: ignore
             return self.__stderr_brief  # type: ignore
 
+    @property
+    def stdout_stats(self) -> _output_buffer.OutputStats:
+        """Stdout metrics: received and dropped due to capture limits or filter lines and bytes.
+
+        :rtype: OutputStats
+
+        .. versionadded:: 2.1.0
+        """
+        with self.__guard():
+            return self.__stdout.stats
+
+    @property
+    def stderr_stats(self) -> _output_buffer.OutputStats:
+        """Stderr metrics: received and dropped due to capture limits or filter lines and bytes.
+
+        :rtype: OutputStats
+
+        .. versionadded:: 2.1.0
+        """
+        with self.__guard():
+            return self.__stderr.stats
+
     @property
     def exit_code(self) -> typing.Union[int, proc_enums.ExitCodes]:
         """Return(exit) code of command.
@@ -333,6 +635,8 @@ class ExecResult:
         with self.lock:
             self.__exit_code = proc_enums.exit_code_to_enum(new_val)
             if self.__exit_code != proc_enums.ExitCodes.EX_INVALID:
+                self.__stdout.freeze()
+                self.__stderr.freeze()
                 self.__timestamp = datetime.datetime.utcnow()  # type: ignore
 
     def __deserialize(self, fmt: str) -> typing.Any:
@@ -342,12 +646,19 @@ class ExecResult:
         :rtype: typing.Any
         :raises NotImplementedError: fmt deserialization not implemented
         :raises DeserializeValueError: Not valid source format
+
+        .. versionchanged:: 2.1.0 result is cached until next read, libyaml is used if available
         """
+        parsed = self.__stdout_parsed
+        if fmt in parsed:
+            return parsed[fmt]
         try:
-            if fmt == 'json':  # pylint: disable=no-else-return
-                return json.loads(self.stdout_str, encoding='utf-8')
-            elif fmt == 'yaml':
-                return yaml.safe_load(self.stdout_str)
+            if fmt == 'json':
+                parsed[fmt] = json.loads(self.stdout_str)
+                return parsed[fmt]
+            if fmt == 'yaml':
+                parsed[fmt] = yaml.load(self.stdout_str, Loader=_YamlLoader)  # nosec  # Safe loader
+                return parsed[fmt]
         except Exception:
             tmpl = (
                 " stdout is not valid {fmt}:\n"
@@ -366,8 +677,10 @@ class ExecResult:
         """JSON from stdout.
 
         :rtype: typing.Any
+
+        .. note:: Cached object is returned on each access: treat it as read-only, copy before modification.
         """
-        with self.lock:
+        with self.__guard():
             return self.__deserialize(fmt='json')
 
     @property
@@ -375,23 +688,145 @@ class ExecResult:
         """YAML from stdout.
 
         :rtype: typing.Any
+
+        .. note:: Cached object is returned on each access: treat it as read-only, copy before modification.
         """
-        with self.lock:
+        with self.__guard():
             return self.__deserialize(fmt='yaml')
 
+    def iter_json(self) -> typing.Iterator[typing.Any]:
+        """Iterate over JSON documents from stdout: one document per line (NDJSON), empty lines are skipped.
+
+        :return: generator of deserialized documents
+        :rtype: typing.Iterator[typing.Any]
+        :raises DeserializeValueError: Not valid JSON line
+
+        Lines are read and parsed one by one: stdout is not joined and decoded as a whole.
+
+        .. versionadded:: 2.1.0
+        """
+        decoder = json.JSONDecoder()
+        for idx, line in enumerate(self.iter_lines()):
+            if not line.strip():
+                continue
+            try:
+                yield decoder.decode(line)
+            except ValueError:
+                tmpl = (
+                    ' stdout line {idx} is not valid json:\n'
+                    '{line!r}\n'.format(idx=idx, line=line)
+                )
+                logger.exception(self.cmd + tmpl)  # pylint: disable=logging-not-lazy
+                raise exceptions.DeserializeValueError(self.cmd + tmpl)
+
+    def to_bytes(self) -> bytes:
+        """Serialize to compact binary format.
+
+        Command, stdin, output lines, exit code, timestamp and encoding are stored.
+        :rtype: bytes
+
+        .. versionadded:: 2.1.0
+        """
+        with self.__guard():
+            flags = 0
+            if self.stdin is not None:
+                flags |= _FLAG_STDIN
+            timestamp = 0
+            if self.timestamp:
+                flags |= _FLAG_TIMESTAMP
+                timestamp = (self.timestamp - _EPOCH) // _MICROSECOND
+
+            chunks = [_SERIAL_HEADER.pack(_SERIAL_MAGIC, _SERIAL_VERSION, flags, int(self.exit_code), timestamp)]
+            texts = [self.cmd, self.encoding]
+            if self.stdin is not None:
+                texts.append(self.stdin)
+            for text in texts:
+                data = text.encode('utf-8', errors='surrogatepass')
+                chunks += [_SERIAL_SIZE.pack(len(data)), data]
+            for buffer in (self.__stdout, self.__stderr):
+                offsets = buffer.offsets()
+                if sys.byteorder != 'little':
+                    offsets.byteswap()
+                with buffer.view() as view:
+                    chunks += [_SERIAL_SIZE.pack(len(offsets)), offsets.tobytes(), view.tobytes()]
+            return b''.join(chunks)
+
+    @classmethod
+    def from_bytes(cls, data: typing.Union[bytes, bytearray, memoryview]) -> 'ExecResult':
+        """Deserialize from binary format produced by to_bytes.
+
+        :param data: serialized result
+        :type data: typing.Union[bytes, bytearray, memoryview]
+        :rtype: ExecResult
+        :raises ValueError: data is not serialized result or version is not supported
+
+        .. versionadded:: 2.1.0
+        """
+        view = memoryview(data)
+        try:
+            magic, version, flags, exit_code, timestamp = _SERIAL_HEADER.unpack_from(view)
+            if magic != _SERIAL_MAGIC:
+                raise ValueError('Data is not serialized execution result')
+            if version != _SERIAL_VERSION:
+                raise ValueError('Unsupported serialization version: {}'.format(version))
+            pos = _SERIAL_HEADER.size
+
+            def read(size: int) -> memoryview:
+                """Read next data block."""
+                nonlocal pos
+                if pos + size > len(view):
+                    raise ValueError('Serialized data is truncated')
+                block = view[pos:pos + size]
+                pos += size
+                return block
+
+            def read_size() -> int:
+                """Read next size."""
+                return _SERIAL_SIZE.unpack(read(_SERIAL_SIZE.size))[0]  # type: ignore
+
+            def read_text() -> str:
+                """Read next text."""
+                return str(read(read_size()), encoding='utf-8', errors='surrogatepass')
+
+            cmd = read_text()
+            encoding = read_text()
+            stdin = read_text() if flags & _FLAG_STDIN else None
+
+            streams = []
+            for _ in range(2):
+                offsets = array.array('Q', read(read_size() * 8).tobytes())
+                if sys.byteorder != 'little':
+                    offsets.byteswap()
+                output = read(offsets[-1] if offsets else 0)
+                streams.append(
+                    [output[start:end].tobytes() for start, end in zip([0] + offsets.tolist(), offsets)]
+                )
+        except struct.error as e:
+            raise ValueError('Serialized data is truncated: {}'.format(e))
+
+        result = cls(cmd=cmd, stdin=stdin, stdout=streams[0], stderr=streams[1], encoding=encoding)
+        with result.lock:
+            result.__exit_code = proc_enums.exit_code_to_enum(exit_code)
+            if flags & _FLAG_TIMESTAMP:
+                result.__stdout.freeze()
+                result.__stderr.freeze()
+                result.__timestamp = _EPOCH + timestamp * _MICROSECOND
+        return result
+
+    def __reduce__(self) -> typing.Tuple[typing.Callable, typing.Tuple[typing.Type['ExecResult'], bytes]]:
+        """Pickle using compact binary format."""
+        return _restore, (self.__class__, self.to_bytes())
+
     def __dir__(self) -> typing.List[str]:
         """Override dir for IDE and as source for getitem checks."""
-        return [
-            'cmd', 'stdout', 'stderr', 'exit_code',
-            'stdout_bin', 'stderr_bin',
-            'stdout_str', 'stderr_str', 'stdout_brief', 'stderr_brief',
-            'stdout_json', 'stdout_yaml',
-            'lock'
-        ]
+        return list(_ATTRIBUTES)
 
     def __getitem__(self, item: str) -> typing.Any:
-        """Dict like get data."""
-        if item in dir(self):
+        """Dict like get data.
+
+        .. versionchanged:: 2.1.0 precomputed attributes table is used
+        """
+        if item in _ATTRIBUTES_SET:
             return getattr(self, item)
         raise IndexError(
             '"{item}" not found in {dir}'.format(
@@ -426,8 +861,37 @@ class ExecResult:
             )
         )
 
+    @property
+    def digest(self) -> str:
+        """Content digest: command, stdin, stdout, stderr and exit code.
+
+        Output digests are updated incrementally on read, result digest is cached after final exit code.
+        Only retained output is included: lines dropped by capture limits or filter are not significant.
+        :rtype: str
+
+        .. versionadded:: 2.1.0
+        """
+        with self.__guard():
+            if self.__digest is not None:
+                return self.__digest
+            digest = _output_buffer.new_hash()
+            digest.update(
+                json.dumps([self.cmd, self.stdin, int(self.exit_code)]).encode('ascii')
+            )
+            digest.update(self.__stdout.digest())
+            digest.update(self.__stderr.digest())
+            if not self.timestamp:
+                return digest.hexdigest()
+            self.__digest = digest.hexdigest()
+            return self.__digest
+
     def __eq__(self, other: typing.Any) -> bool:
-        """Comparision."""
+        """Comparision.
+
+        .. versionchanged:: 2.1.0 results are compared by digest
+        """
+        if isinstance(other, ExecResult):
+            return self.__class__ is other.__class__ and self.digest == other.digest
         return hash(self) == hash(other)
 
     def __ne__(self, other: typing.Any) -> bool:
@@ -435,9 +899,8 @@ class ExecResult:
         return not self.__eq__(other)
 
     def __hash__(self) -> int:
-        """Hash for usage as dict key and in sets."""
-        return hash(
-            (
-                self.__class__, self.cmd, self.stdin, self.stdout, self.stderr,
-                self.exit_code
-            ))
+        """Hash for usage as dict key and in sets.
+
+        .. versionchanged:: 2.1.0 hash of content digest: output is not read
+        """
+        return hash((self.__class__, self.digest))
@@ -0,0 +1,144 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Streamed execution: output lines as they arrive.
+
+.. versionadded:: 2.1.0
+"""
+
+import typing
+import weakref
+
+from exec_helpers import proc_enums
+
+__all__ = ('ExecStream', )
+
+_type_stream_source = typing.Generator[
+    typing.Tuple[str, bytes],
+    None,
+    typing.Union[int, proc_enums.ExitCodes]
+]
+
+
+def _close_source(source: _type_stream_source, on_close: typing.Optional[typing.Callable[[], None]]) -> None:
+    """Close source generator and call close callback."""
+    try:
+        source.close()
+    finally:
+        if on_close is not None:
+            on_close()
+
+
+class ExecStream:
+    """Iterator over command output with exit code available at the end.
+
+    Yields ``(stream, line)`` tuples, where stream is ``'stdout'`` or ``'stderr'`` and line is ``bytes``.
+    Output is not stored: memory usage does not depend on output size.
+    Stream is closed on exhaustion, error, explicit close or garbage collection.
+    """
+
+    __slots__ = (
+        '__cmd',
+        '__source',
+        '__finalizer',
+        '__exit_code',
+        '__weakref__',
+    )
+
+    def __init__(
+        self,
+        cmd: str,
+        source: _type_stream_source,
+        on_close: typing.Optional[typing.Callable[[], None]] = None,
+    ) -> None:
+        """Iterator over command output with exit code available at the end.
+
+        :param cmd: command
+        :type cmd: str
+        :param source: generator of (stream, line), which returns exit code on stop
+        :type source: typing.Generator[typing.Tuple[str, bytes], None, typing.Union[int, ExitCodes]]
+        :param on_close: callback for call on stream close (exhausted, closed, failed or garbage collected).
+                         Called once in any source state: should stop command and release resources.
+        :type on_close: typing.Optional[typing.Callable[[], None]]
+        """
+        self.__cmd = cmd
+        self.__source = source
+        self.__finalizer = weakref.finalize(self, _close_source, source, on_close)
+        self.__exit_code = proc_enums.ExitCodes.EX_INVALID  # type: typing.Union[int, proc_enums.ExitCodes]
+
+    @property
+    def cmd(self) -> str:
+        """Executed command.
+
+        :rtype: str
+        """
+        return self.__cmd
+
+    @property
+    def exit_code(self) -> typing.Union[int, proc_enums.ExitCodes]:
+        """Return(exit) code of command. EX_INVALID until all output is read.
+
+        :rtype: typing.Union[int, proc_enums.ExitCodes]
+        """
+        return self.__exit_code
+
+    @property
+    def closed(self) -> bool:
+        """Stream is closed: no more data.
+
+        :rtype: bool
+        """
+        return not self.__finalizer.alive
+
+    def close(self) -> None:
+        """Stop reading. If command is still running, it will be terminated."""
+        self.__finalizer()
+
+    def __iter__(self) -> 'ExecStream':
+        """Iterator protocol."""
+        return self
+
+    def __next__(self) -> typing.Tuple[str, bytes]:
+        """Get next output line.
+
+        :rtype: typing.Tuple[str, bytes]
+        :raises ExecHelperTimeoutError: Timeout exceeded
+        """
+        if self.closed:
+            raise StopIteration()
+        try:
+            return next(self.__source)
+        except StopIteration as e:
+            self.__exit_code = proc_enums.exit_code_to_enum(e.value)
+            self.close()
+            raise StopIteration()
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self) -> 'ExecStream':
+        """Context manager: close stream on exit."""
+        return self
+
+    def __exit__(self, exc_type: typing.Any, exc_val: typing.Any, exc_tb: typing.Any) -> None:
+        """Context manager: close stream on exit."""
+        self.close()
+
+    def __repr__(self) -> str:
+        """Representation for debugging."""
+        return '{cls}(cmd={cmd!r}, exit_code={exit_code!s})'.format(
+            cls=self.__class__.__name__,
+            cmd=self.cmd,
+            exit_code=self.exit_code
+        )
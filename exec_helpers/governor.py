@@ -0,0 +1,286 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Process-wide concurrency governor: limits for running commands.
+
+.. versionadded:: 2.1.0
+"""
+
+import collections
+import contextlib
+import threading
+import time
+import typing
+
+__all__ = ('Governor', 'GovernorStats', 'get_governor', 'set_governor')
+
+GovernorStats = collections.namedtuple(
+    'GovernorStats',
+    ['acquired', 'waited', 'wait_time', 'max_wait_time', 'in_flight']
+)
+GovernorStats.__doc__ = """Governor metrics.
+
+acquired: amount of granted slots
+waited: amount of slots granted after wait
+wait_time: total wait time in seconds
+max_wait_time: maximum wait time for a single slot in seconds
+in_flight: amount of currently running commands
+"""
+
+
+class Governor:
+    """Concurrency governor: global and per-host limits for running commands with per-host rate limit.
+
+    Slot is acquired before opening channel or spawning process and released after command completion.
+    """
+
+    __slots__ = (
+        '__max_in_flight',
+        '__max_per_host',
+        '__rate',
+        '__burst',
+        '__condition',
+        '__in_flight',
+        '__per_host',
+        '__buckets',
+        '__acquired',
+        '__waited',
+        '__wait_time',
+        '__max_wait_time',
+    )
+
+    def __init__(
+        self,
+        max_in_flight: typing.Optional[int] = None,
+        max_per_host: typing.Optional[int] = None,
+        rate: typing.Optional[float] = None,
+        burst: int = 1,
+    ) -> None:
+        """Concurrency governor: global and per-host limits for running commands with per-host rate limit.
+
+        :param max_in_flight: Maximum amount of simultaneously running commands. Not limited by default.
+        :type max_in_flight: typing.Optional[int]
+        :param max_per_host: Maximum amount of simultaneously running commands per host. Not limited by default.
+        :type max_per_host: typing.Optional[int]
+        :param rate: Maximum amount of command starts per second per host (token bucket). Not limited by default.
+        :type rate: typing.Optional[float]
+        :param burst: Token bucket size: amount of command starts per host allowed at once.
+        :type burst: int
+        :raises ValueError: limit is not positive
+        """
+        for name, limit in (
+            ('max_in_flight', max_in_flight), ('max_per_host', max_per_host), ('rate', rate), ('burst', burst)
+        ):
+            if limit is not None and limit <= 0:
+                raise ValueError('{name} should be positive, got {limit!r}'.format(name=name, limit=limit))
+        self.__max_in_flight = max_in_flight
+        self.__max_per_host = max_per_host
+        self.__rate = rate
+        self.__burst = burst
+
+        self.__condition = threading.Condition()
+        self.__in_flight = 0
+        self.__per_host = collections.Counter()  # type: typing.Dict[typing.Hashable, int]
+        self.__buckets = {}  # type: typing.Dict[typing.Hashable, typing.Tuple[float, float]]
+
+        self.__acquired = 0
+        self.__waited = 0
+        self.__wait_time = 0.0
+        self.__max_wait_time = 0.0
+
+    @property
+    def max_in_flight(self) -> typing.Optional[int]:
+        """Maximum amount of simultaneously running commands.
+
+        :rtype: typing.Optional[int]
+        """
+        return self.__max_in_flight
+
+    @property
+    def max_per_host(self) -> typing.Optional[int]:
+        """Maximum amount of simultaneously running commands per host.
+
+        :rtype: typing.Optional[int]
+        """
+        return self.__max_per_host
+
+    @property
+    def rate(self) -> typing.Optional[float]:
+        """Maximum amount of command starts per second per host.
+
+        :rtype: typing.Optional[float]
+        """
+        return self.__rate
+
+    @property
+    def burst(self) -> int:
+        """Token bucket size.
+
+        :rtype: int
+        """
+        return self.__burst
+
+    @property
+    def stats(self) -> GovernorStats:
+        """Governor metrics.
+
+        :rtype: GovernorStats
+        """
+        with self.__condition:
+            return GovernorStats(
+                acquired=self.__acquired,
+                waited=self.__waited,
+                wait_time=self.__wait_time,
+                max_wait_time=self.__max_wait_time,
+                in_flight=self.__in_flight,
+            )
+
+    def reset_stats(self) -> None:
+        """Reset wait metrics."""
+        with self.__condition:
+            self.__acquired = self.__waited = 0
+            self.__wait_time = self.__max_wait_time = 0.0
+
+    def __tokens(self, host: typing.Hashable, now: float) -> float:
+        """Available tokens for host."""
+        tokens, stamp = self.__buckets.get(host, (self.__burst, now))
+        return min(float(self.__burst), tokens + (now - stamp) * self.__rate)  # type: ignore
+
+    def __delay(self, host: typing.Hashable, now: float) -> typing.Optional[float]:
+        """Time to wait before slot acquire: 0 if free, None if wait for release is required."""
+        if self.__max_in_flight is not None and self.__in_flight >= self.__max_in_flight:
+            return None
+        if self.__max_per_host is not None and self.__per_host[host] >= self.__max_per_host:
+            return None
+        if self.__rate is not None:
+            tokens = self.__tokens(host, now)
+            if tokens < 1:
+                return (1 - tokens) / self.__rate
+        return 0.0
+
+    def __take(self, host: typing.Hashable, now: float, wait_time: float) -> None:
+        """Take slot and update metrics."""
+        self.__in_flight += 1
+        self.__per_host[host] += 1
+        if self.__rate is not None:
+            self.__buckets[host] = (self.__tokens(host, now) - 1, now)
+
+        self.__acquired += 1
+        if wait_time > 0:
+            self.__waited += 1
+            self.__wait_time += wait_time
+            self.__max_wait_time = max(self.__max_wait_time, wait_time)
+
+    def try_acquire(self, host: typing.Hashable) -> bool:
+        """Acquire slot for command on host without waiting.
+
+        :param host: host identifier
+        :type host: typing.Hashable
+        :return: slot is acquired
+        :rtype: bool
+        """
+        with self.__condition:
+            now = time.monotonic()
+            if self.__delay(host, now) != 0:
+                return False
+            self.__take(host, now, 0)
+            return True
+
+    def acquire(self, host: typing.Hashable, timeout: typing.Union[int, float, None] = None) -> bool:
+        """Acquire slot for command on host: wait for free slot and rate limit token.
+
+        :param host: host identifier
+        :type host: typing.Hashable
+        :param timeout: maximum wait time. Wait without limit if None.
+        :type timeout: typing.Union[int, float, None]
+        :return: slot is acquired (False only if timeout is reached)
+        :rtype: bool
+        """
+        with self.__condition:
+            started = now = time.monotonic()
+            delay = self.__delay(host, now)
+            while delay != 0:
+                if timeout is not None:
+                    remaining = started + timeout - now
+                    if remaining <= 0:
+                        return False
+                    delay = remaining if delay is None else min(delay, remaining)
+                self.__condition.wait(delay)
+                now = time.monotonic()
+                delay = self.__delay(host, now)
+            self.__take(host, now, now - started)
+            return True
+
+    def release(self, host: typing.Hashable) -> None:
+        """Release slot for command on host.
+
+        :param host: host identifier
+        :type host: typing.Hashable
+        """
+        with self.__condition:
+            self.__in_flight -= 1
+            self.__per_host[host] -= 1
+            if not self.__per_host[host]:
+                del self.__per_host[host]
+            self.__condition.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, host: typing.Hashable) -> typing.Iterator[None]:
+        """Context manager: acquire slot for command on host and release on exit.
+
+        :param host: host identifier
+        :type host: typing.Hashable
+        """
+        self.acquire(host)
+        try:
+            yield
+        finally:
+            self.release(host)
+
+    def __repr__(self) -> str:
+        """Representation for debugging."""
+        return (
+            '{cls}('
+            'max_in_flight={self.max_in_flight!r}, '
+            'max_per_host={self.max_per_host!r}, '
+            'rate={self.rate!r}, '
+            'burst={self.burst!r}'
+            ')'.format(
+                cls=self.__class__.__name__,
+                self=self
+            )
+        )
+
+
+_governor = Governor()  # Not limited by default
+
+
+def get_governor() -> Governor:
+    """Get process-wide governor.
+
+    :rtype: Governor
+    """
+    return _governor
+
+
+def set_governor(governor: typing.Optional[Governor] = None) -> None:
+    """Set process-wide governor. Not limited governor is used if None.
+
+    :param governor: new governor
+    :type governor: typing.Optional[Governor]
+
+    Commands already running are released on the governor, which was used on start.
+    """
+    global _governor  # pylint: disable=global-statement
+    _governor = governor if governor is not None else Governor()
@@ -0,0 +1,248 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Parallel execution on any ExecHelper implementations.
+
+.. versionadded:: 2.1.0
+"""
+
+import collections
+import concurrent.futures
+import typing
+
+from exec_helpers import api
+from exec_helpers import constants
+from exec_helpers import exceptions
+from exec_helpers import exec_result
+from exec_helpers import governor
+from exec_helpers import proc_enums
+
+__all__ = ('ParallelExecutor', )
+
+_type_tasks = typing.Mapping[typing.Hashable, typing.Tuple[api.ExecHelper, str]]
+
+
+class ParallelExecutor:
+    """Run commands on any mix of ExecHelper instances (Subprocess, SSHClient, ...) concurrently.
+
+    Helper lock is not acquired: commands on the same helper run in parallel,
+    use max_per_backend to limit them.
+    """
+
+    __slots__ = (
+        '__max_workers',
+        '__max_per_backend',
+    )
+
+    def __init__(
+        self,
+        max_workers: typing.Optional[int] = None,
+        max_per_backend: typing.Optional[int] = None,
+    ) -> None:
+        """Run commands on any mix of ExecHelper instances concurrently.
+
+        :param max_workers: Maximum amount of commands running simultaneously. All commands at once by default.
+        :type max_workers: typing.Optional[int]
+        :param max_per_backend: Maximum amount of commands running simultaneously on the same helper.
+        :type max_per_backend: typing.Optional[int]
+        :raises ValueError: limit is not positive
+        """
+        for name, limit in (('max_workers', max_workers), ('max_per_backend', max_per_backend)):
+            if limit is not None and limit <= 0:
+                raise ValueError('{name} should be positive, got {limit!r}'.format(name=name, limit=limit))
+        self.__max_workers = max_workers
+        self.__max_per_backend = max_per_backend
+
+    @property
+    def max_workers(self) -> typing.Optional[int]:
+        """Maximum amount of commands running simultaneously.
+
+        :rtype: typing.Optional[int]
+        """
+        return self.__max_workers
+
+    @property
+    def max_per_backend(self) -> typing.Optional[int]:
+        """Maximum amount of commands running simultaneously on the same helper.
+
+        :rtype: typing.Optional[int]
+        """
+        return self.__max_per_backend
+
+    @staticmethod
+    def __execute_one(
+        helper: api.ExecHelper,
+        command: str,
+        timeout: typing.Union[int, float, None],
+        verbose: bool,
+        **kwargs: typing.Any
+    ) -> exec_result.ExecResult:
+        """Execute command on helper without acquiring helper lock."""
+        # pylint: disable=protected-access
+        with governor.get_governor().slot(helper._governor_key):
+            (
+                iface,
+                _,
+                stderr,
+                stdout,
+            ) = helper.execute_async(
+                command,
+                verbose=verbose,
+                **kwargs
+            )
+            result = helper._exec_command(
+                command=command,
+                interface=iface,
+                stdout=stdout,
+                stderr=stderr,
+                timeout=timeout,
+                verbose=verbose,
+                **kwargs
+            )
+        helper._store_result(result)
+        return result
+        # pylint: enable=protected-access
+
+    def execute_iter(
+        self,
+        tasks: _type_tasks,
+        timeout: typing.Union[int, float, None] = constants.DEFAULT_TIMEOUT,
+        verbose: bool = False,
+        **kwargs: typing.Any
+    ) -> typing.Iterator[typing.Tuple[typing.Hashable, typing.Union[exec_result.ExecResult, Exception]]]:
+        """Execute commands and produce results in order of completion.
+
+        :param tasks: dictionary {key: (helper, command)}
+        :type tasks: typing.Mapping[typing.Hashable, typing.Tuple[ExecHelper, str]]
+        :param timeout: Timeout for each command execution (counted from command start).
+        :type timeout: typing.Union[int, float, None]
+        :param verbose: Produce log.info records for command call and output
+        :type verbose: bool
+        :return: generator of (key, result or raised exception)
+        :rtype: typing.Iterator[typing.Tuple[typing.Hashable, typing.Union[ExecResult, Exception]]]
+
+        Exit codes are not checked. If generator is closed before the end, not started commands are skipped,
+        running commands are waited for.
+        Commands of different helpers are started in turn: one command per helper.
+        """
+        queues = collections.OrderedDict()  # type: collections.OrderedDict[api.ExecHelper, typing.Deque]
+        for key, (helper, command) in tasks.items():
+            queues.setdefault(helper, collections.deque()).append((key, command))
+        in_flight = collections.Counter()  # type: typing.Dict[api.ExecHelper, int]
+        running = {}  # type: typing.Dict[concurrent.futures.Future, typing.Tuple[typing.Hashable, api.ExecHelper]]
+        workers = self.max_workers or max(len(tasks), 1)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                while queues or running:
+                    # Start commands in round-robin order: at most one command per helper on each pass,
+                    # served helper is moved to the end, so the next start begins from the following helper
+                    started = True
+                    while started and len(running) < workers:
+                        started = False
+                        for helper in list(queues):
+                            if len(running) >= workers:
+                                break
+                            if self.max_per_backend is not None and in_flight[helper] >= self.max_per_backend:
+                                continue
+                            queue = queues[helper]
+                            key, command = queue.popleft()
+                            future = executor.submit(
+                                self.__execute_one, helper, command, timeout, verbose, **kwargs
+                            )
+                            running[future] = key, helper
+                            in_flight[helper] += 1
+                            started = True
+                            if queue:
+                                queues.move_to_end(helper)
+                            else:
+                                del queues[helper]
+
+                    done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        key, helper = running.pop(future)
+                        in_flight[helper] -= 1
+                        try:
+                            result = future.result()  # type: typing.Union[exec_result.ExecResult, Exception]
+                        except Exception as e:
+                            result = e
+                        yield key, result
+            finally:
+                for future in running:
+                    future.cancel()
+
+    def execute(
+        self,
+        tasks: _type_tasks,
+        timeout: typing.Union[int, float, None] = constants.DEFAULT_TIMEOUT,
+        expected: typing.Optional[typing.Iterable[typing.Union[int, proc_enums.ExitCodes]]] = None,
+        raise_on_err: bool = True,
+        verbose: bool = False,
+        **kwargs: typing.Any
+    ) -> typing.Dict[typing.Hashable, exec_result.ExecResult]:
+        """Execute commands and wait for all results.
+
+        :param tasks: dictionary {key: (helper, command)}
+        :type tasks: typing.Mapping[typing.Hashable, typing.Tuple[ExecHelper, str]]
+        :param timeout: Timeout for each command execution (counted from command start).
+        :type timeout: typing.Union[int, float, None]
+        :param expected: expected return codes (0 by default)
+        :type expected: typing.Optional[typing.Iterable[typing.Union[int, ExitCodes]]]
+        :param raise_on_err: Raise exception on unexpected return code
+        :type raise_on_err: bool
+        :param verbose: Produce log.info records for command call and output
+        :type verbose: bool
+        :return: dictionary {key: result}
+        :rtype: typing.Dict[typing.Hashable, ExecResult]
+        :raises ParallelCallProcessError: Unexpected any code at lest on one target
+        :raises ParallelCallExceptions: At lest one exception raised during execution (including timeout)
+        """
+        expected = expected or [proc_enums.ExitCodes.EX_OK]
+        expected = proc_enums.exit_codes_to_enums(expected)
+
+        commands = {command for _, command in tasks.values()}
+        command = commands.pop() if len(commands) == 1 else '<{} commands>'.format(len(commands))
+
+        results = {}
+        errors = {}
+        raised_exceptions = {}
+
+        for key, result in self.execute_iter(tasks, timeout=timeout, verbose=verbose, **kwargs):
+            if isinstance(result, Exception):
+                raised_exceptions[key] = result
+                continue
+            results[key] = result
+            if result.exit_code not in expected:
+                errors[key] = result
+
+        if raised_exceptions:  # always raise
+            raise exceptions.ParallelCallExceptions(
+                command,
+                raised_exceptions,
+                errors,
+                results,
+                expected=expected
+            )
+        if errors and raise_on_err:
+            raise exceptions.ParallelCallProcessError(
+                command, errors, results, expected=expected
+            )
+        return results
+
+    def __repr__(self) -> str:
+        """Representation for debugging."""
+        return '{cls}(max_workers={self.max_workers!r}, max_per_backend={self.max_per_backend!r})'.format(
+            cls=self.__class__.__name__,
+            self=self
+        )
@@ -0,0 +1,279 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Persistent indexed storage for execution results.
+
+.. versionadded:: 2.1.0
+"""
+
+import datetime
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import typing
+import zlib
+
+from exec_helpers import exec_result
+from exec_helpers import _output_buffer
+
+__all__ = ('ResultStore', )
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS results ('
+    'id INTEGER PRIMARY KEY, '
+    'host TEXT NOT NULL, '
+    'cmd TEXT NOT NULL, '
+    'cmd_digest TEXT NOT NULL, '
+    'exit_code INTEGER NOT NULL, '
+    'timestamp REAL, '
+    'data BLOB NOT NULL'
+    ')',
+    'CREATE INDEX IF NOT EXISTS results_host_cmd ON results (host, cmd_digest, timestamp)',
+    'CREATE INDEX IF NOT EXISTS results_cmd ON results (cmd_digest, timestamp)',
+    'CREATE INDEX IF NOT EXISTS results_exit_code ON results (exit_code, timestamp)',
+    'CREATE INDEX IF NOT EXISTS results_timestamp ON results (timestamp)',
+)
+_INSERT = (
+    'INSERT INTO results (host, cmd, cmd_digest, exit_code, timestamp, data) VALUES (?, ?, ?, ?, ?, ?)'
+)
+
+# Maximum amount of results written in one transaction
+_WRITE_BATCH = 256
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_STOP = object()
+
+
+def _format_host(host: typing.Hashable) -> str:
+    """Host identifier as text: (hostname, port) is formatted as hostname:port."""
+    if isinstance(host, tuple) and len(host) == 2:
+        return '{}:{}'.format(*host)
+    return str(host)
+
+
+def _cmd_digest(cmd: str) -> str:
+    """Command digest for index lookup."""
+    return _output_buffer.new_hash(cmd.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+
+def _epoch(timestamp: typing.Optional[datetime.datetime]) -> typing.Optional[float]:
+    """Timestamp as seconds since epoch."""
+    if timestamp is None:
+        return None
+    return (timestamp - _EPOCH).total_seconds()
+
+
+class ResultStore:
+    """SQLite (WAL mode) storage of execution results with asynchronous writes.
+
+    Results are indexed by host, command, exit code and timestamp, output is stored compressed.
+    Writes are performed by background thread: put() does not wait for disk.
+    """
+
+    __slots__ = (
+        '__path',
+        '__queue',
+        '__writer',
+        '__lock',
+    )
+
+    def __init__(self, path: str) -> None:
+        """SQLite (WAL mode) storage of execution results with asynchronous writes.
+
+        :param path: database file path
+        :type path: str
+        """
+        self.__path = os.path.expanduser(path)
+        self.__queue = queue.Queue()  # type: queue.Queue
+        self.__writer = None  # type: typing.Optional[threading.Thread]
+        self.__lock = threading.Lock()
+
+        with self.__connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            for statement in _SCHEMA:
+                connection.execute(statement)
+        connection.close()
+
+    @property
+    def path(self) -> str:
+        """Database file path.
+
+        :rtype: str
+        """
+        return self.__path
+
+    def __connect(self) -> sqlite3.Connection:
+        """Open database connection."""
+        connection = sqlite3.connect(self.__path, timeout=60)
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def __write(self) -> None:
+        """Writer thread: store queued results in batches."""
+        connection = self.__connect()
+        try:
+            while True:
+                batch = [self.__queue.get()]
+                while len(batch) < _WRITE_BATCH:
+                    try:
+                        batch.append(self.__queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = _STOP in batch
+                rows = []
+                for item in batch:
+                    if item is _STOP:
+                        continue
+                    host, result = item
+                    try:
+                        rows.append(
+                            (
+                                host,
+                                result.cmd,
+                                _cmd_digest(result.cmd),
+                                int(result.exit_code),
+                                _epoch(result.timestamp),
+                                zlib.compress(result.to_bytes()),
+                            )
+                        )
+                    except Exception:
+                        logger.exception('Failed to serialize result of {!r} on {}'.format(result.cmd, host))
+                try:
+                    with connection:
+                        connection.executemany(_INSERT, rows)
+                except sqlite3.Error:
+                    logger.exception('Failed to store {} results in {}'.format(len(rows), self.__path))
+                for _ in batch:
+                    self.__queue.task_done()
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def put(self, host: typing.Hashable, result: exec_result.ExecResult) -> None:
+        """Queue result for storage.
+
+        :param host: host identifier: name or (hostname, port)
+        :type host: typing.Hashable
+        :param result: finished execution result
+        :type result: ExecResult
+        """
+        with self.__lock:
+            if self.__writer is None:
+                self.__writer = threading.Thread(target=self.__write, name='ResultStore writer', daemon=True)
+                self.__writer.start()
+            self.__queue.put((_format_host(host), result))
+
+    def flush(self) -> None:
+        """Wait until all queued results are stored."""
+        self.__queue.join()
+
+    def close(self) -> None:
+        """Store queued results and stop writer thread."""
+        with self.__lock:
+            writer, self.__writer = self.__writer, None
+            if writer is None:
+                return
+            self.__queue.put(_STOP)
+        writer.join()
+
+    def query(
+        self,
+        host: typing.Optional[typing.Hashable] = None,
+        command: typing.Optional[str] = None,
+        exit_code: typing.Optional[int] = None,
+        since: typing.Optional[datetime.datetime] = None,
+        until: typing.Optional[datetime.datetime] = None,
+        limit: typing.Optional[int] = None,
+    ) -> typing.Iterator[typing.Tuple[str, exec_result.ExecResult]]:
+        """Find stored results, newest first.
+
+        :param host: host identifier: name or (hostname, port)
+        :type host: typing.Optional[typing.Hashable]
+        :param command: command (masked as in result)
+        :type command: typing.Optional[str]
+        :param exit_code: exit code
+        :type exit_code: typing.Optional[int]
+        :param since: minimal timestamp (UTC)
+        :type since: typing.Optional[datetime.datetime]
+        :param until: maximal timestamp (UTC)
+        :type until: typing.Optional[datetime.datetime]
+        :param limit: maximum amount of results
+        :type limit: typing.Optional[int]
+        :return: generator of (host, result)
+        :rtype: typing.Iterator[typing.Tuple[str, ExecResult]]
+
+        Results are loaded one by one. Queued, but not written yet results are not found: use flush() before.
+        """
+        conditions = []
+        params = []  # type: typing.List[typing.Any]
+        for condition, value in (
+            ('host = ?', _format_host(host) if host is not None else None),
+            ('cmd_digest = ?', _cmd_digest(command) if command is not None else None),
+            ('exit_code = ?', int(exit_code) if exit_code is not None else None),
+            ('timestamp >= ?', _epoch(since)),
+            ('timestamp <= ?', _epoch(until)),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        sql = 'SELECT host, cmd, data FROM results'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY timestamp DESC, id DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        connection = self.__connect()
+        try:
+            for found_host, cmd, data in connection.execute(sql, params):
+                if command is not None and cmd != command:  # Digest collision
+                    continue
+                yield found_host, exec_result.ExecResult.from_bytes(zlib.decompress(data))
+        finally:
+            connection.close()
+
+    def last(
+        self,
+        command: str,
+        host: typing.Optional[typing.Hashable] = None,
+    ) -> typing.Optional[exec_result.ExecResult]:
+        """Get the last stored result of command.
+
+        :param command: command (masked as in result)
+        :type command: str
+        :param host: host identifier: name or (hostname, port)
+        :type host: typing.Optional[typing.Hashable]
+        :rtype: typing.Optional[ExecResult]
+        """
+        for _, result in self.query(host=host, command=command, limit=1):
+            return result
+        return None
+
+    def __enter__(self) -> 'ResultStore':
+        """Context manager usage."""
+        return self
+
+    def __exit__(self, exc_type: typing.Any, exc_val: typing.Any, exc_tb: typing.Any) -> None:
+        """Context manager usage: store queued results."""
+        self.close()
+
+    def __repr__(self) -> str:
+        """Representation for debugging."""
+        return '{cls}(path={self.path!r})'.format(cls=self.__class__.__name__, self=self)
@@ -16,11 +16,15 @@
 
 """SSH client helper based on Paramiko. Extended API helpers."""
 
+import concurrent.futures
 import logging
 import os
 import posixpath
+import typing
 
-
+from exec_helpers import constants
+from exec_helpers import governor
+from exec_helpers import _file_distribution
 from ._ssh_client_base import SSHClientBase
 
 __all__ = ('SSHClient', )
@@ -88,6 +92,106 @@ class SSHClient(SSHClientBase):
                     self._sftp.unlink(remote_path)
                 self._sftp.put(local_path, remote_path)
 
+    def __prepare_tree(self, tree: _file_distribution.LocalTree, target: str) -> str:
+        """Create target directories for mapped local files.
+
+        :return: target path for tree root
+        :rtype: str
+        """
+        if self.isdir(target):
+            target = posixpath.join(target, tree.name)
+
+        if tree.is_dir:
+            for reldir in tree.dirs:
+                self.mkdir(posixpath.normpath(posixpath.join(target, reldir)))
+        return target
+
+    def __upload_tree(
+        self,
+        tree: _file_distribution.LocalTree,
+        target: str,
+        throttle: typing.Optional[_file_distribution.Throttle],
+    ) -> int:
+        """Upload local files to prepared target using SFTP session: file is mapped only during its upload.
+
+        :return: amount of uploaded bytes
+        :rtype: int
+        """
+        if not tree.is_dir:
+            with tree.content(0) as data:
+                self._sftp.putfo(_file_distribution.SharedReader(data, throttle), target, file_size=len(data))
+                return len(data)
+
+        uploaded = 0
+        for index, relpath in enumerate(tree.files):
+            remote_path = posixpath.join(target, relpath)
+            if self.exists(remote_path):
+                self._sftp.unlink(remote_path)
+            with tree.content(index) as data:
+                self._sftp.putfo(_file_distribution.SharedReader(data, throttle), remote_path, file_size=len(data))
+                uploaded += len(data)
+        return uploaded
+
+    @classmethod
+    def distribute(
+        cls,
+        source: str,
+        target: str,
+        remotes: typing.Iterable['SSHClient'],
+        max_workers: typing.Optional[int] = None,
+        bandwidth: typing.Union[int, float, None] = None,
+    ) -> typing.Dict[typing.Tuple[str, int], typing.Union[int, Exception]]:
+        """Upload file(s) from source to target on multiple remotes in parallel.
+
+        :param source: local file or directory
+        :type source: str
+        :param target: remote path
+        :type target: str
+        :param remotes: Connections to upload on
+        :type remotes: typing.Iterable[SSHClient]
+        :param max_workers: Maximum amount of remotes processed simultaneously. 32 by default.
+        :type max_workers: typing.Optional[int]
+        :param bandwidth: Aggregate upload speed limit for all remotes in bytes per second. Not limited by default.
+        :type bandwidth: typing.Union[int, float, None]
+        :return: dictionary {(hostname, port): uploaded bytes or raised exception}
+        :rtype: typing.Dict[typing.Tuple[str, int], typing.Union[int, Exception]]
+
+        Local file is mapped to memory once and shared by all concurrent uploads of it.
+        Governor slot is held during file transfers only.
+
+        .. versionadded:: 2.1.0
+        """
+        throttle = _file_distribution.Throttle(bandwidth) if bandwidth is not None else None
+        concurrency = governor.get_governor()
+        targets = set(remotes)  # Use distinct remotes
+
+        def upload(remote: 'SSHClient') -> int:
+            """Upload to remote."""
+            # pylint: disable=protected-access
+            # Directories are created by commands, which acquire governor slot themselves
+            tree_target = remote.__prepare_tree(tree, target)
+            with concurrency.slot(remote._governor_key):
+                return remote.__upload_tree(tree, tree_target, throttle)
+            # pylint: enable=protected-access
+
+        results = {}  # type: typing.Dict[typing.Tuple[str, int], typing.Union[int, Exception]]
+
+        with _file_distribution.LocalTree(source) as tree:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers or max(min(len(targets), constants.DEFAULT_MAX_WORKERS), 1)
+            ) as executor:
+                futures = {
+                    executor.submit(upload, remote): remote for remote in targets
+                }  # type: typing.Dict[concurrent.futures.Future, SSHClient]
+
+                for future in concurrent.futures.as_completed(futures):
+                    remote = futures[future]
+                    try:
+                        results[(remote.hostname, remote.port)] = future.result()
+                    except Exception as e:
+                        results[(remote.hostname, remote.port)] = e
+        return results
+
     def download(self, destination: str, target: str) -> bool:
         """Download file(s) to target from destination.
 
@@ -21,8 +21,10 @@ import collections
 import concurrent.futures
 import errno
 import logging
+import queue
 import subprocess  # nosec  # Expected usage
 import threading
+import time
 import typing
 
 import threaded
@@ -30,10 +32,14 @@ import threaded
 from exec_helpers import api
 from exec_helpers import exec_result
 from exec_helpers import exceptions
+from exec_helpers import proc_enums
 from exec_helpers import _log_templates
 
 logger = logging.getLogger(__name__)  # type: logging.Logger
 
+# Maximum lines buffered between pipe readers and stream consumer
+STREAM_QUEUE_SIZE = 1024
+
 
 class SingletonMeta(abc.ABCMeta):
     """Metaclass for Singleton.
@@ -137,7 +143,7 @@ class Subprocess(api.ExecHelper, metaclass=SingletonMeta):
         # Store command with hidden data
         cmd_for_log = self._mask_command(cmd=command, log_mask_re=log_mask_re)
 
-        result = exec_result.ExecResult(cmd=cmd_for_log)
+        result = self._make_result(cmd_for_log, **kwargs)
 
         # pylint: disable=assignment-from-no-return
         # noinspection PyNoneFunctionAssignment
@@ -176,6 +182,117 @@ class Subprocess(api.ExecHelper, metaclass=SingletonMeta):
         logger.debug(wait_err_msg)
         raise exceptions.ExecHelperTimeoutError(result=result, timeout=timeout)
 
+    def _stream_command(
+        self,
+        command: str,
+        interface: subprocess.Popen,
+        stdout: typing.Optional[typing.IO],
+        stderr: typing.Optional[typing.IO],
+        timeout: typing.Union[int, float, None],
+        verbose: bool = False,
+        log_mask_re: typing.Optional[str] = None,
+        **kwargs: typing.Any
+    ) -> typing.Generator[typing.Tuple[str, bytes], None, typing.Union[int, proc_enums.ExitCodes]]:
+        """Get output lines from process as they arrive and return exit code.
+
+        :param command: Command for execution
+        :type command: str
+        :param interface: Control interface
+        :type interface: subprocess.Popen
+        :param stdout: STDOUT pipe or file-like object
+        :type stdout: typing.Optional[typing.IO]
+        :param stderr: STDERR pipe or file-like object
+        :type stderr: typing.Optional[typing.IO]
+        :param timeout: Timeout for command execution
+        :type timeout: typing.Union[int, float, None]
+        :param verbose: produce verbose log record on command call
+        :type verbose: bool
+        :param log_mask_re: regex lookup rule to mask command for logger.
+                            all MATCHED groups will be replaced by '<*masked*>'
+        :type log_mask_re: typing.Optional[str]
+        :rtype: typing.Generator[typing.Tuple[str, bytes], None, typing.Union[int, proc_enums.ExitCodes]]
+        :raises ExecHelperTimeoutError: Timeout exceeded
+
+        Pipes are read by pooled threads into bounded queue: slow consumer pauses the process output.
+        Process is not stopped by generator: use _stop_command on close.
+
+        .. versionadded:: 2.1.0
+        """
+        lines = queue.Queue(maxsize=STREAM_QUEUE_SIZE)  # type: queue.Queue
+        stop_event = threading.Event()
+
+        def put(item: typing.Tuple[str, typing.Optional[bytes]]) -> None:
+            """Put item to the queue if stream is not closed."""
+            while not stop_event.is_set():
+                try:
+                    lines.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        @threaded.threadpooled  # type: ignore
+        def poll_pipe(name: str, src: typing.IO) -> None:
+            """Sync pipe poll to the queue."""
+            try:
+                for line in src:
+                    put((name, line))
+                    if stop_event.is_set():
+                        return
+            except IOError:
+                pass
+            finally:
+                put((name, None))
+
+        pipes = [(name, src) for name, src in (('stdout', stdout), ('stderr', stderr)) if src is not None]
+        for name, src in pipes:
+            poll_pipe(name, src)
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        def remaining() -> typing.Optional[float]:
+            """Time left before timeout."""
+            return max(deadline - time.monotonic(), 0) if deadline is not None else None
+
+        try:
+            active = len(pipes)
+            while active:
+                try:
+                    name, line = lines.get(timeout=remaining())
+                except queue.Empty:
+                    break
+                if line is None:
+                    active -= 1
+                    continue
+                logger.log(  # type: ignore
+                    level=logging.INFO if verbose else logging.DEBUG,
+                    msg=line.decode('utf-8', errors='backslashreplace').rstrip()
+                )
+                yield name, line
+
+            try:
+                return interface.wait(timeout=remaining())  # type: ignore
+            except subprocess.TimeoutExpired:
+                result = exec_result.ExecResult(cmd=self._mask_command(cmd=command, log_mask_re=log_mask_re))
+                wait_err_msg = _log_templates.CMD_WAIT_ERROR.format(result=result, timeout=timeout)
+                logger.debug(wait_err_msg)
+                raise exceptions.ExecHelperTimeoutError(result=result, timeout=timeout)
+        finally:
+            stop_event.set()
+
+    def _stop_command(self, interface: subprocess.Popen) -> None:
+        """Kill process if it is still running.
+
+        :param interface: Control interface
+        :type interface: subprocess.Popen
+
+        .. versionadded:: 2.1.0
+        """
+        if interface.poll() is None:
+            try:
+                interface.kill()  # kill -9
+            except OSError:  # pragma: no cover
+                pass  # Process completed just now
+
     # pylint: disable=function-redefined, unused-argument
     # noinspection PyMethodOverriding
     @typing.overload  # type: ignore
@@ -63,11 +63,20 @@ requires_optimization = [
     _extension('exec_helpers._log_templates'),
     _extension('exec_helpers.exceptions'),
     _extension('exec_helpers.exec_result'),
+    _extension('exec_helpers._output_buffer'),
+    _extension('exec_helpers.exec_stream'),
     _extension('exec_helpers.proc_enums'),
     _extension('exec_helpers._ssh_client_base'),
+    _extension('exec_helpers._ssh_channel'),
+    _extension('exec_helpers._ssh_reactor'),
+    _extension('exec_helpers._output_interner'),
+    _extension('exec_helpers._file_distribution'),
     _extension('exec_helpers.ssh_auth'),
     _extension('exec_helpers.ssh_client'),
     _extension('exec_helpers.subprocess_runner'),
+    _extension('exec_helpers.parallel_executor'),
+    _extension('exec_helpers.governor'),
+    _extension('exec_helpers.result_store'),
 ]
 
 if 'win32' != sys.platform:
@@ -20,6 +20,10 @@ from __future__ import unicode_literals
 
 # pylint: disable=no-self-use
 
+import pickle
+import re
+import threading
+import time
 import unittest
 
 import mock
@@ -104,11 +108,7 @@ class TestExecResult(unittest.TestCase):
             hash(
                 (
                     exec_helpers.ExecResult,
-                    cmd,
-                    None,
-                    (),
-                    (),
-                    exec_helpers.ExitCodes.EX_INVALID
+                    result.digest
                 )
             )
         )
@@ -255,3 +255,314 @@ class TestExecResult(unittest.TestCase):
     def test_stdin_bytearray(self):
         result = exec_helpers.ExecResult(cmd, stdin=bytearray(b'STDIN'), exit_code=0)
         self.assertEqual(result.stdin, u'STDIN')
+
+    def test_read_many(self):
+        result = exec_helpers.ExecResult(cmd)
+        for idx in range(1000):
+            result.read_stdout([b'line\n'])
+            result.read_stderr([str(idx).encode()])
+        stdout = result.stdout
+        self.assertEqual(stdout, (b'line\n',) * 1000)
+        self.assertIs(result.stdout, stdout)  # Cached until next read
+        self.assertEqual(len(result.stderr), 1000)
+        result.read_stdout([b'last\n'])
+        self.assertEqual(result.stdout[-1], b'last\n')
+        self.assertEqual(len(result.stdout), 1001)
+
+    def test_compact_storage(self):
+        result = exec_helpers.ExecResult(cmd)
+        result.read_stdout([b'line ' + str(idx).encode() + b'\n' for idx in range(10)])
+        result.read_stdout([b'', b'tail'])
+        self.assertEqual(len(result.stdout), 12)
+        self.assertEqual(result.stdout[-2:], (b'', b'tail'))
+        self.assertEqual(result.stdout_bin, bytearray(b''.join(result.stdout)))
+        self.assertEqual(
+            result.stdout_brief,
+            'line 0\nline 1\nline 2\n...\nline 9\ntail'
+        )
+
+    def test_spill(self):
+        result = exec_helpers.ExecResult(cmd, stdout=[b'line 0\n'], spill_threshold=16)
+        buffer, _ = result._output_buffers
+        self.assertFalse(buffer.spilled)
+        result.read_stdout([b'line ' + str(idx).encode() + b'\n' for idx in range(1, 10)])
+        self.assertTrue(buffer.spilled)
+        self.assertEqual(result.stdout[0], b'line 0\n')
+        self.assertEqual(len(result.stdout), 10)
+        self.assertEqual(result.stdout_str, '\n'.join('line {}'.format(idx) for idx in range(10)))
+        self.assertEqual(buffer._OutputBuffer__text, '')  # Spilled data is not decoded to memory
+        self.assertIsNot(result.stdout_str, result.stdout_str)
+        result.read_stdout([b'last'])
+        self.assertEqual(result.stdout[-1], b'last')
+        self.assertEqual(buffer.size, 74)
+
+    def test_capture_limits(self):
+        result = exec_helpers.ExecResult(cmd, capture_head=2, capture_tail=3)
+        result.read_stdout([str(idx).encode() + b'\n' for idx in range(100)])
+        self.assertEqual(result.stdout, (b'0\n', b'1\n', b'97\n', b'98\n', b'99\n'))
+        self.assertEqual(result.stdout_brief, '0\n1\n...\n97\n98\n99')
+        self.assertEqual(result.stdout_stats, exec_helpers.OutputStats(100, 290, 95, 277))
+        self.assertEqual(result.stderr_stats, exec_helpers.OutputStats(0, 0, 0, 0))
+
+        result = exec_helpers.ExecResult(cmd, capture_tail=5)
+        result.read_stdout([b'0\n', b'1\n'])
+        self.assertEqual(result.stdout_bin, bytearray(b'0\n1\n'))
+        self.assertEqual(result.stdout_stats.lines_dropped, 0)
+
+        with self.assertRaises(ValueError):
+            exec_helpers.ExecResult(cmd, capture_head=-1)
+
+    def test_view(self):
+        result = exec_helpers.ExecResult(cmd, stdout=[b' line 1\n', b'line 2\n'])
+        view = result.stdout_view
+        self.assertTrue(view.readonly)
+        self.assertEqual(view, b' line 1\nline 2\n')
+        self.assertIs(result.stdout_view.obj, view.obj)  # Joined once
+        self.assertEqual(result.stdout_str, 'line 1\nline 2')
+
+        result.read_stdout([b'line 3\n'])
+        self.assertEqual(view, b' line 1\nline 2\n')  # Previous view is not changed
+        self.assertEqual(result.stdout_view, b' line 1\nline 2\nline 3\n')
+        self.assertEqual(result.stderr_view, b'')
+
+        view = result.stdout_view
+        result.exit_code = 0  # Finished: joined data is the only copy
+        buffer, _ = result._output_buffers
+        self.assertIs(result.stdout_view.obj, buffer._OutputBuffer__data)
+        self.assertIs(result.stdout_view.obj, view.obj)
+
+        result = exec_helpers.ExecResult(cmd, capture_head=1, capture_tail=2)
+        result.read_stdout([b'line 1\n', b'line 2\n', b'line 3\n', b'line 4\n'])
+        result.exit_code = 0
+        buffer, _ = result._output_buffers
+        self.assertIs(result.stdout_view.obj, buffer._OutputBuffer__data)
+        self.assertEqual(result.stdout_view, b'line 1\nline 3\nline 4\n')
+        self.assertEqual(result.stdout, (b'line 1\n', b'line 3\n', b'line 4\n'))
+        self.assertEqual(result.stdout_str, 'line 1\nline 3\nline 4')
+        self.assertEqual(result.stdout_brief, 'line 1\n...\nline 3\nline 4')
+        result.compact()
+        self.assertEqual(result.stdout_view, b'line 1\nline 3\nline 4\n')
+
+        result = exec_helpers.ExecResult(cmd, stdout=[b'line 1\n'], spill_threshold=0)
+        view = result.stdout_view
+        self.assertTrue(view.readonly)
+        result.read_stdout([b'line 2\n'])
+        self.assertEqual(view, b'line 1\n')
+        self.assertEqual(result.stdout_view, b'line 1\nline 2\n')
+
+    def test_incremental_decode(self):
+        data = 'строка\n'.encode('utf-8')
+        result = exec_helpers.ExecResult(cmd)
+        result.read_stdout([data[:3]])  # Split code point
+        self.assertEqual(result.stdout_str, 'с\\xd1')
+        result.read_stdout([data[3:]])
+        self.assertEqual(result.stdout_str, 'строка')
+        result.read_stdout([data])
+        self.assertEqual(result.stdout_str, 'строка\nстрока')
+        buffer, _ = result._output_buffers
+        self.assertTrue(buffer._OutputBuffer__text)
+        result.exit_code = 0  # Finished: decoded text is kept by result only
+        self.assertEqual(buffer._OutputBuffer__text, '')
+        self.assertEqual(buffer.text(), 'строка\nстрока\n')
+        self.assertEqual(buffer._OutputBuffer__text, '')
+        self.assertIs(result.stdout_str, result.stdout_str)
+
+        result = exec_helpers.ExecResult(cmd, stdout=['line\n'.encode('utf-16-le')], encoding='utf-16-le')
+        self.assertEqual(result.encoding, 'utf-16-le')
+        self.assertEqual(result.stdout_str, 'line')
+        self.assertEqual(result.stdout_brief, 'line')
+
+        result = exec_helpers.ExecResult(cmd, capture_head=1, capture_tail=1)
+        result.read_stdout([b'first\n', b'dropped\n', data])
+        self.assertEqual(result.stdout_str, 'first\nстрока')
+
+    def test_shared_decode(self):
+        lines = ['строка {}\n'.format(idx).encode('utf-8') for idx in range(100)]
+        source = exec_helpers.ExecResult(cmd, stdout=lines)
+        results = [exec_helpers.ExecResult(cmd) for _ in range(4)]
+        for result in results:
+            result._set_shared_output(*source._output_buffers)
+
+        view = exec_helpers._output_buffer.OutputBuffer._OutputBuffer__view
+
+        def slow_view(buffer):
+            time.sleep(0.05)  # Let other threads reach decoding
+            return view(buffer)
+
+        texts = []
+        with mock.patch('exec_helpers._output_buffer.OutputBuffer._OutputBuffer__view', slow_view):
+            threads = [
+                threading.Thread(target=lambda result=result: texts.append(result.stdout_str)) for result in results
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(texts, [b''.join(lines).decode('utf-8').strip()] * len(results))
+
+    def test_iter_lines(self):
+        result = exec_helpers.ExecResult(
+            cmd,
+            stdout=[str(idx).encode() + b'\n' for idx in range(3000)],
+            stderr=['ошибка\r\n'.encode('utf-8')],
+        )
+        with mock.patch('exec_helpers._output_buffer.OutputBuffer.lines', new_callable=mock.PropertyMock) as lines:
+            self.assertEqual(list(result.iter_lines()), [str(idx) for idx in range(3000)])
+            self.assertEqual(list(result.iter_lines('stderr')), ['ошибка'])
+            self.assertEqual(list(result.iter_lines('stderr', decode=False)), ['ошибка'.encode('utf-8')])
+            self.assertEqual(next(result.iter_bytes()), b'0\n')
+            lines.assert_not_called()
+
+        with self.assertRaises(ValueError):
+            next(result.iter_bytes('stdin'))
+
+        # Incomplete code point at the end of output is not lost
+        result = exec_helpers.ExecResult(cmd, stdout=[b'line\n', 'строка'.encode('utf-8')[:3]])
+        self.assertEqual(list(result.iter_lines()), ['line', 'с\\xd1'])
+        self.assertEqual(list(result.iter_lines())[-1], result.stdout_str.splitlines()[-1])
+
+    def test_iter_json(self):
+        result = exec_helpers.ExecResult('test', stdout=[b'{"test": 1}\n', b'\n', b'[2]\n'])
+        self.assertEqual(list(result.iter_json()), [{'test': 1}, [2]])
+
+        result.read_stdout([b'{"broken"\n'])
+        with self.assertRaises(exec_helpers.ExecHelperError):
+            list(result.iter_json())
+
+    def test_parsed_cache(self):
+        result = exec_helpers.ExecResult('test', stdout=[b'{"test": true}'])
+        parsed = result.stdout_json
+        self.assertIs(result.stdout_json, parsed)
+        self.assertIs(result.stdout_yaml, result.stdout_yaml)
+        self.assertEqual(result.stdout_yaml, {'test': True})
+
+        result.read_stdout([b'\n'])
+        self.assertIsNot(result.stdout_json, parsed)  # Cache is invalidated on read
+
+    def test_digest(self):
+        result1 = exec_helpers.ExecResult(cmd, stdout=[b'line 1\n'])
+        result2 = exec_helpers.ExecResult(cmd, stdout=[b'line ', b'1\n'])
+        self.assertNotEqual(result1.digest, result2.digest)  # Line boundaries are significant
+        self.assertNotEqual(result1, result2)
+
+        result2 = exec_helpers.ExecResult(cmd)
+        result2.read_stdout([b'line 1\n'])
+        self.assertEqual(result1.digest, result2.digest)
+        self.assertEqual(result1, result2)
+        self.assertEqual(len({result1, result2}), 1)
+
+        # Only retained output is significant
+        lines = [b'match 1\n', b'other\n', b'match 2\n']
+        filtered = exec_helpers.ExecResult(cmd, stdout=lines, capture_filter=re.compile(b'match'))
+        self.assertNotEqual(filtered, exec_helpers.ExecResult(cmd, stdout=lines, capture_filter=re.compile(b'other')))
+        self.assertEqual(filtered, exec_helpers.ExecResult(cmd, stdout=[b'match 1\n', b'match 2\n']))
+        self.assertEqual(
+            exec_helpers.ExecResult(cmd, stdout=lines, capture_head=1, capture_tail=1),
+            exec_helpers.ExecResult(
+                cmd, stdout=[b'match 1\n', b'dropped\n', b'match 2\n'], capture_head=1, capture_tail=1
+            )
+        )
+        self.assertEqual(
+            exec_helpers.ExecResult(cmd, stdout=lines, capture_tail=2).digest,
+            exec_helpers.ExecResult(cmd, stdout=lines[1:]).digest
+        )
+
+        result1.exit_code = result2.exit_code = 0
+        digest = result1.digest
+        self.assertNotEqual(digest, exec_helpers.ExecResult(cmd, stdout=[b'line 1\n']).digest)
+        with mock.patch('exec_helpers._output_buffer.OutputBuffer.digest') as buffer_digest:
+            self.assertEqual(result1.digest, digest)  # Frozen after final exit code
+            buffer_digest.assert_not_called()
+
+    def test_frozen(self):
+        result = exec_helpers.ExecResult(cmd, stdout=[b'{"test": 1}\n'])
+        result.exit_code = 0
+        self.assertEqual(result.stdout_str, '{"test": 1}')  # Decoded text is cached under lock
+        self.assertEqual(result.stderr_str, '')
+
+        def read():
+            for item in dir(result):
+                if item != 'lock':
+                    results.append(result[item])
+            results.append(result.digest)
+            results.append(hash(result))
+
+        results = []
+        with result.lock:  # Frozen result is readable while lock is held by other thread
+            reader = threading.Thread(target=read)
+            reader.start()
+            reader.join(timeout=5)
+            self.assertFalse(reader.is_alive())
+        self.assertIn({'test': 1}, results)
+
+    def test_compact(self):
+        stdout = [('line {}\n'.format(idx) * 10).encode() for idx in range(50000)]
+        result = exec_helpers.ExecResult(cmd, stdout=stdout, stderr=[b'error\n'])
+        with self.assertRaises(RuntimeError):
+            result.compact()
+
+        result.exit_code = 0
+        digest = result.digest
+        stdout_str = result.stdout_str
+        stdout_brief = result.stdout_brief
+
+        for method in ('zlib', 'lzma'):
+            result.compact(method)
+            buffer, _ = result._output_buffers
+            self.assertTrue(buffer.compressed)
+            self.assertEqual(list(result.iter_bytes()), stdout)
+            self.assertEqual(result.stdout_str, stdout_str)
+            self.assertIsNot(result.stdout_str, result.stdout_str)  # Decoded text is not kept in memory
+            self.assertEqual(buffer._OutputBuffer__text, '')
+            self.assertEqual(result.stdout_brief, stdout_brief)
+            self.assertEqual(result.stderr, (b'error\n', ))
+            self.assertEqual(result.stdout_view, b''.join(stdout))
+            self.assertEqual(result.digest, digest)
+
+        with self.assertRaises(ValueError):
+            result.compact('unknown')
+
+    def test_serialization(self):
+        result = exec_helpers.ExecResult(
+            cmd,
+            stdin='input',
+            stdout=[b'line 1\n', 'строка\n'.encode('utf-8'), b''],
+            stderr=[b'error'],
+            exit_code=2,
+        )
+        data = result.to_bytes()
+        restored = exec_helpers.ExecResult.from_bytes(data)
+        self.assertEqual(restored, result)
+        self.assertEqual(restored.stdout, result.stdout)
+        self.assertEqual(restored.timestamp, result.timestamp)
+        self.assertEqual(restored.exit_code, 2)
+
+        restored = pickle.loads(pickle.dumps(result))
+        self.assertEqual(restored, result)
+        self.assertEqual(restored.stdin, 'input')
+
+        restored = exec_helpers.ExecResult.from_bytes(exec_helpers.ExecResult(cmd).to_bytes())
+        self.assertIsNone(restored.stdin)
+        self.assertIsNone(restored.timestamp)
+        self.assertEqual(restored.exit_code, exec_helpers.ExitCodes.EX_INVALID)
+
+        with self.assertRaises(ValueError):
+            exec_helpers.ExecResult.from_bytes(data[:-1])
+        with self.assertRaises(ValueError):
+            exec_helpers.ExecResult.from_bytes(data[:10])
+        with self.assertRaises(ValueError):
+            exec_helpers.ExecResult.from_bytes(b'X' + data[1:])
+
+    def test_capture_filter(self):
+        stdout = [b'ok\n', b'error: 1\n', b'ok\n', 'ошибка\n'.encode('utf-8'), b'error: 2\n']
+        result = exec_helpers.ExecResult(cmd, stdout=stdout, capture_filter=re.compile(br'^error'))
+        self.assertEqual(result.stdout, (b'error: 1\n', b'error: 2\n'))
+        self.assertEqual(result.stdout_stats.lines_dropped, 3)
+        self.assertEqual(result.stdout_stats.lines, 5)
+        self.assertEqual(result.stdout_brief, 'error: 1\nerror: 2')
+
+        result = exec_helpers.ExecResult(cmd, stdout=stdout, capture_filter=re.compile('ошибка|2'))
+        self.assertEqual(result.stdout_str, 'ошибка\nerror: 2')
+
+        result = exec_helpers.ExecResult(cmd, stdout=stdout, capture_filter=lambda line: line.startswith(b'ok'))
+        self.assertEqual(result.stdout, (b'ok\n', b'ok\n'))
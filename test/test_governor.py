@@ -0,0 +1,142 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import threading
+import time
+import unittest
+
+import mock
+
+import exec_helpers
+from exec_helpers import subprocess_runner
+
+
+class TestGovernor(unittest.TestCase):
+    def tearDown(self):
+        exec_helpers.set_governor()
+
+    def test_001_limits(self):
+        governor = exec_helpers.Governor(max_in_flight=2, max_per_host=1)
+
+        self.assertTrue(governor.try_acquire('host1'))
+        self.assertFalse(governor.try_acquire('host1'))
+        self.assertTrue(governor.try_acquire('host2'))
+        self.assertFalse(governor.try_acquire('host3'))
+        self.assertEqual(governor.stats.in_flight, 2)
+
+        governor.release('host1')
+        self.assertTrue(governor.try_acquire('host3'))
+
+        with self.assertRaises(ValueError):
+            exec_helpers.Governor(max_per_host=0)
+
+    def test_002_acquire_wait(self):
+        governor = exec_helpers.Governor(max_in_flight=1)
+        governor.acquire('host')
+
+        timer = threading.Timer(0.1, governor.release, args=('host', ))
+        timer.start()
+        with governor.slot('host'):
+            pass
+        timer.join()
+
+        stats = governor.stats
+        self.assertEqual(stats.acquired, 2)
+        self.assertEqual(stats.waited, 1)
+        self.assertGreater(stats.wait_time, 0)
+        self.assertEqual(stats.wait_time, stats.max_wait_time)
+        self.assertEqual(stats.in_flight, 0)
+
+        governor.reset_stats()
+        self.assertEqual(governor.stats, exec_helpers.GovernorStats(0, 0, 0.0, 0.0, 0))
+
+        governor.acquire('host')
+        started = time.monotonic()
+        self.assertFalse(governor.acquire('host', timeout=0.1))
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertFalse(governor.acquire('host', timeout=0))
+        self.assertEqual(governor.stats.acquired, 1)
+        governor.release('host')
+        self.assertTrue(governor.acquire('host', timeout=0))
+        governor.release('host')
+
+    @mock.patch('time.monotonic')
+    def test_003_rate(self, monotonic):
+        monotonic.return_value = 100.0
+        governor = exec_helpers.Governor(rate=2, burst=2)
+
+        self.assertTrue(governor.try_acquire('host'))
+        self.assertTrue(governor.try_acquire('host'))
+        self.assertFalse(governor.try_acquire('host'))
+        self.assertTrue(governor.try_acquire('other'))
+
+        monotonic.return_value = 100.5  # 1 token in 0.5 seconds
+        self.assertTrue(governor.try_acquire('host'))
+        self.assertFalse(governor.try_acquire('host'))
+
+    def test_004_process_wide(self):
+        governor = exec_helpers.Governor(max_in_flight=1)
+        exec_helpers.set_governor(governor)
+        self.assertIs(exec_helpers.get_governor(), governor)
+
+        subprocess_runner.SingletonMeta._instances.clear()
+        runner = exec_helpers.Subprocess()
+        with mock.patch('exec_helpers.subprocess_runner.Subprocess.execute_async') as execute_async:
+            with mock.patch('exec_helpers.subprocess_runner.Subprocess._exec_command') as exec_command:
+                execute_async.return_value = None, None, None, None
+
+                def exec_command_side_effect(*args, **kwargs):
+                    self.assertEqual(governor.stats.in_flight, 1)
+                    time.sleep(0.01)
+                    return exec_helpers.ExecResult(cmd='cmd', exit_code=0)
+
+                exec_command.side_effect = exec_command_side_effect
+
+                runner.execute('cmd')
+                exec_helpers.ParallelExecutor().execute({idx: (runner, 'cmd') for idx in range(3)})
+
+        stats = governor.stats
+        self.assertEqual(stats.acquired, 4)
+        self.assertEqual(stats.in_flight, 0)
+        self.assertGreater(stats.waited, 0)
+
+        exec_helpers.set_governor()
+        self.assertIsNot(exec_helpers.get_governor(), governor)
+
+    def test_005_slot_before_lock(self):
+        governor = exec_helpers.Governor(max_per_host=1)
+        exec_helpers.set_governor(governor)
+
+        subprocess_runner.SingletonMeta._instances.clear()
+        runner = exec_helpers.Subprocess()
+        with mock.patch('exec_helpers.subprocess_runner.Subprocess.execute_async') as execute_async:
+            with mock.patch('exec_helpers.subprocess_runner.Subprocess._exec_command') as exec_command:
+                execute_async.return_value = None, None, None, None
+                exec_command.return_value = exec_helpers.ExecResult(cmd='cmd', exit_code=0)
+
+                governor.acquire('localhost')
+                worker = threading.Thread(target=runner.execute, args=('cmd', ))
+                worker.start()
+                time.sleep(0.1)
+                # Helper lock is not held while waiting for slot
+                self.assertTrue(runner.lock.acquire(timeout=1))
+                runner.lock.release()
+                governor.release('localhost')
+                worker.join(timeout=5)
+                self.assertFalse(worker.is_alive())
+        exec_command.assert_called_once()
@@ -0,0 +1,150 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import collections
+import logging
+import threading
+import time
+import unittest
+
+import exec_helpers
+from exec_helpers import api
+from exec_helpers import exec_result
+
+
+class FakeHelper(api.ExecHelper):
+    """Helper with instant execution and concurrency statistics."""
+
+    def __init__(self, exit_code=0, delay=0.01, fail=False):
+        super(FakeHelper, self).__init__(logger=logging.getLogger(self.__class__.__name__))
+        self.exit_code = exit_code
+        self.delay = delay
+        self.fail = fail
+        self.running = 0
+        self.max_running = 0
+        self.stats_lock = threading.Lock()
+
+    def execute_async(self, command, stdin=None, open_stdout=True, open_stderr=True, verbose=False,
+                      log_mask_re=None, **kwargs):
+        if self.fail:
+            raise RuntimeError(command)
+        with self.stats_lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        return None, None, None, None
+
+    def _exec_command(self, command, interface, stdout, stderr, timeout, verbose=False, log_mask_re=None,
+                      **kwargs):
+        time.sleep(self.delay)
+        with self.stats_lock:
+            self.running -= 1
+        return exec_result.ExecResult(cmd=command, stdout=[command.encode()], exit_code=self.exit_code)
+
+
+class TestParallelExecutor(unittest.TestCase):
+    def test_001_execute(self):
+        local = FakeHelper()
+        remote = FakeHelper()
+        tasks = {
+            'build': (local, 'make'),
+            'test': (local, 'make test'),
+            ('remote', 22): (remote, 'deploy'),
+        }
+
+        results = exec_helpers.ParallelExecutor().execute(tasks)
+
+        self.assertEqual(sorted(results, key=str), sorted(tasks, key=str))
+        for key, (_, command) in tasks.items():
+            self.assertEqual(results[key].cmd, command)
+            self.assertEqual(results[key].stdout, (command.encode(), ))
+            self.assertEqual(results[key].exit_code, exec_helpers.ExitCodes.EX_OK)
+        self.assertEqual(local.max_running, 2)  # Helper lock is not used
+
+    def test_002_limits(self):
+        first = FakeHelper()
+        second = FakeHelper()
+        tasks = {}
+        for idx in range(4):
+            tasks[('first', idx)] = first, 'cmd'
+            tasks[('second', idx)] = second, 'cmd'
+
+        executor = exec_helpers.ParallelExecutor(max_workers=3, max_per_backend=1)
+        results = executor.execute(tasks)
+
+        self.assertEqual(len(results), len(tasks))
+        self.assertEqual(first.max_running, 1)
+        self.assertEqual(second.max_running, 1)
+
+        with self.assertRaises(ValueError):
+            exec_helpers.ParallelExecutor(max_per_backend=0)
+
+    def test_003_errors(self):
+        ok = FakeHelper()
+        bad = FakeHelper(exit_code=1)
+
+        with self.assertRaises(exec_helpers.ParallelCallProcessError) as cm:
+            exec_helpers.ParallelExecutor().execute({'ok': (ok, 'cmd'), 'bad': (bad, 'cmd')})
+        exc = cm.exception
+        self.assertEqual(sorted(exc.results), ['bad', 'ok'])
+        self.assertEqual(list(exc.errors), ['bad'])
+        self.assertIn('bad - ', str(exc))
+
+        results = exec_helpers.ParallelExecutor().execute(
+            {'ok': (ok, 'cmd'), 'bad': (bad, 'cmd')}, raise_on_err=False)
+        self.assertEqual(results['bad'].exit_code, 1)
+
+        with self.assertRaises(exec_helpers.ParallelCallExceptions) as cm:
+            exec_helpers.ParallelExecutor().execute({'ok': (ok, 'cmd'), 'failed': (FakeHelper(fail=True), 'cmd')})
+        exc = cm.exception
+        self.assertIsInstance(exc.exceptions['failed'], RuntimeError)
+        self.assertEqual(list(exc.results), ['ok'])
+
+    def test_004_execute_iter(self):
+        fast = FakeHelper(delay=0)
+        slow = FakeHelper(delay=0.2)
+
+        results = list(exec_helpers.ParallelExecutor().execute_iter({'slow': (slow, 'cmd'), 'fast': (fast, 'cmd')}))
+        self.assertEqual([key for key, _ in results], ['fast', 'slow'])
+
+    def test_005_round_robin(self):
+        first = FakeHelper(delay=0)
+        second = FakeHelper(delay=0)
+        tasks = collections.OrderedDict()
+        for idx in range(3):
+            tasks[('first', idx)] = first, 'cmd'
+        for idx in range(3):
+            tasks[('second', idx)] = second, 'cmd'
+
+        results = exec_helpers.ParallelExecutor(max_workers=1).execute_iter(tasks)
+        self.assertEqual(
+            [key for key, _ in results],
+            [('first', 0), ('second', 0), ('first', 1), ('second', 1), ('first', 2), ('second', 2)]
+        )
+
+        # Each helper gets a worker without per helper limit
+        first = FakeHelper(delay=0.1)
+        second = FakeHelper(delay=0.1)
+        tasks = collections.OrderedDict()
+        for idx in range(4):
+            tasks[('first', idx)] = first, 'cmd'
+        for idx in range(4):
+            tasks[('second', idx)] = second, 'cmd'
+
+        exec_helpers.ParallelExecutor(max_workers=2).execute(tasks)
+        self.assertEqual(first.max_running, 1)
+        self.assertEqual(second.max_running, 1)
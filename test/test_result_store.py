@@ -0,0 +1,98 @@
+#    Copyright 2018 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+import exec_helpers
+from exec_helpers import subprocess_runner
+
+
+def make_result(cmd, exit_code=0, stdout=(b'output\n', )):
+    result = exec_helpers.ExecResult(cmd=cmd, stdout=stdout)
+    result.exit_code = exit_code
+    return result
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'results.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_001_put_query(self):
+        with exec_helpers.ResultStore(self.path) as store:
+            first = make_result('uname')
+            store.put(('host1', 22), first)
+            store.put(('host2', 22), make_result('uname', exit_code=1))
+            last = make_result('uname', stdout=[b'new\n'])
+            store.put(('host1', 22), last)
+            store.put('localhost', make_result('ls'))
+            store.flush()
+
+            self.assertEqual(store.last('uname', host=('host1', 22)), last)
+            self.assertEqual(store.last('uname', host='host1:22').stdout, (b'new\n', ))
+            self.assertIsNone(store.last('uname', host='localhost'))
+            self.assertIsNone(store.last('missing'))
+
+            self.assertEqual(
+                [host for host, _ in store.query(command='uname')],
+                ['host1:22', 'host2:22', 'host1:22']
+            )
+            self.assertEqual(
+                [(host, result.cmd) for host, result in store.query(exit_code=1)],
+                [('host2:22', 'uname')]
+            )
+            self.assertEqual(len(list(store.query(limit=2))), 2)
+            self.assertEqual(len(list(store.query(since=first.timestamp))), 4)
+            self.assertEqual(len(list(store.query(until=first.timestamp - datetime.timedelta(seconds=1)))), 0)
+
+        # Persistent
+        store = exec_helpers.ResultStore(self.path)
+        self.assertEqual(store.last('ls').stdout, (b'output\n', ))
+        self.assertEqual(repr(store), 'ResultStore(path={!r})'.format(self.path))
+
+    def test_002_helper(self):
+        subprocess_runner.SingletonMeta._instances.clear()
+        runner = exec_helpers.Subprocess()
+        store = exec_helpers.ResultStore(self.path)
+        runner.result_store = store
+        try:
+            with mock.patch('exec_helpers.subprocess_runner.Subprocess.execute_async') as execute_async:
+                with mock.patch('exec_helpers.subprocess_runner.Subprocess._exec_command') as exec_command:
+                    execute_async.return_value = None, None, None, None
+                    exec_command.side_effect = lambda command, **kwargs: make_result(command)
+
+                    runner.execute('cmd')
+                    exec_helpers.ParallelExecutor().execute({idx: (runner, 'cmd {}'.format(idx)) for idx in range(3)})
+            store.close()
+
+            self.assertEqual(
+                sorted(result.cmd for _, result in store.query(host='localhost')),
+                ['cmd', 'cmd 0', 'cmd 1', 'cmd 2']
+            )
+        finally:
+            runner.result_store = None
+            store.close()
@@ -23,17 +23,22 @@ from __future__ import unicode_literals
 # pylint: disable=no-self-use
 
 import base64
+import concurrent.futures
+import itertools
 import logging
+import mmap
 import os
 import posixpath
+import shutil
 import stat
+import tempfile
+import threading
 import unittest
 
 import mock
 import paramiko
 
 import exec_helpers
-from exec_helpers import constants
 from exec_helpers import exec_result
 
 
@@ -48,6 +53,50 @@ class FakeStream(object):
             yield self.__src.pop(0)
 
 
+class FakeChannel(object):
+    """Channel with data in buffers for thread-free readers."""
+
+    def __init__(self, stdout=b'', stderr=b'', exit_status=0, completed=True):
+        self.__stdout = stdout
+        self.__stderr = stderr
+        self.exit_status = exit_status
+        self.status_event = threading.Event()
+        if completed:
+            self.status_event.set()
+        self.close = mock.Mock(side_effect=self.__close_pipe)
+        self.__pipe = None
+
+    def fileno(self):
+        # Always readable: selectors report channel on each call
+        if self.__pipe is None:
+            self.__pipe = os.pipe()
+            os.write(self.__pipe[1], b'*')
+        return self.__pipe[0]
+
+    def __close_pipe(self):
+        if self.__pipe is not None:
+            for fd in self.__pipe:
+                os.close(fd)
+            self.__pipe = None
+
+    def recv_ready(self):
+        return bool(self.__stdout)
+
+    def recv(self, nbytes):
+        data, self.__stdout = self.__stdout[:nbytes], self.__stdout[nbytes:]
+        return data
+
+    def recv_stderr_ready(self):
+        return bool(self.__stderr)
+
+    def recv_stderr(self, nbytes):
+        data, self.__stderr = self.__stderr[:nbytes], self.__stderr[nbytes:]
+        return data
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+
 host = '127.0.0.1'
 port = 22
 username = 'user'
@@ -749,6 +798,22 @@ class TestExecute(unittest.TestCase):
 
         return chan, '', exp_result, stderr, stdout
 
+    @staticmethod
+    def get_patched_channel_execute_async_side_effect(ec=0, completed=True):
+        """get execute_async side effect with new channel on each call
+
+        :rtype: typing.Callable
+        """
+        def side_effect(*args, **kwargs):
+            chan = FakeChannel(
+                stdout=b''.join(stdout_list),
+                stderr=b''.join(stderr_list),
+                exit_status=ec,
+                completed=completed,
+            )
+            return chan, '', mock.Mock(), mock.Mock()
+        return side_effect
+
     @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
     def test_019_execute(
         self,
@@ -1095,10 +1160,7 @@ class TestExecute(unittest.TestCase):
 
     @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
     def test_027_execute_together(self, execute_async, client, policy, logger):
-        (
-            chan, _stdin, _, stderr, stdout
-        ) = self.get_patched_execute_async_retval()
-        execute_async.return_value = chan, _stdin, stderr, stdout
+        execute_async.side_effect = self.get_patched_channel_execute_async_side_effect()
 
         host2 = '127.0.0.2'
 
@@ -1119,17 +1181,10 @@ class TestExecute(unittest.TestCase):
             remotes=remotes, command=command)
 
         self.assertEqual(execute_async.call_count, len(remotes))
-        self.assertEqual(
-            sorted(chan.mock_calls),
-            sorted((
-                mock.call.status_event.wait(constants.DEFAULT_TIMEOUT),
-                mock.call.recv_exit_status(),
-                mock.call.close(),
-                mock.call.status_event.wait(constants.DEFAULT_TIMEOUT),
-                mock.call.recv_exit_status(),
-                mock.call.close()
-            ))
-        )
+        for result in results.values():  # type: exec_result.ExecResult
+            self.assertEqual(result.stdout, tuple(stdout_list))
+            self.assertEqual(result.stderr, tuple(stderr_list))
+            self.assertEqual(result.exit_code, exec_helpers.ExitCodes.EX_OK)
         self.assertIn((ssh.hostname, ssh.port), results)
         self.assertIn((ssh2.hostname, ssh2.port), results)
         for result in results.values():  # type: exec_result.ExecResult
@@ -1182,6 +1237,354 @@ class TestExecute(unittest.TestCase):
         for exception in exc.exceptions.values():
             self.assertIsInstance(exception, RuntimeError)
 
+    @mock.patch('select.select')
+    @mock.patch('concurrent.futures.ThreadPoolExecutor', wraps=concurrent.futures.ThreadPoolExecutor)
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_timeout(self, execute_async, executor, select, client, policy, logger):
+        execute_async.side_effect = self.get_patched_channel_execute_async_side_effect(completed=False)
+
+        host2 = '127.0.0.2'
+
+        ssh = self.get_ssh()
+        # noinspection PyTypeChecker
+        ssh2 = exec_helpers.SSHClient(
+            host=host2,
+            port=port,
+            auth=exec_helpers.SSHAuth(
+                username=username,
+                password=password
+            ))
+
+        remotes = [ssh, ssh2]
+
+        # noinspection PyTypeChecker
+        with self.assertRaises(exec_helpers.ParallelCallExceptions) as cm:
+            exec_helpers.SSHClient.execute_together(
+                remotes=remotes, command=command, timeout=0.01, max_workers=1, global_timeout=60)
+
+        executor.assert_called_once_with(max_workers=1)
+        exc = cm.exception  # type: exec_helpers.ParallelCallExceptions
+        self.assertEqual(
+            list(sorted(exc.exceptions)),
+            [(host, port), (host2, port)]
+        )
+        for exception in exc.exceptions.values():
+            self.assertIsInstance(exception, exec_helpers.ExecHelperTimeoutError)
+            self.assertEqual(exception.timeout, 0.01)
+            # Output is drained while waiting for exit code
+            self.assertEqual(exception.result.stdout, tuple(stdout_list))
+
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_global_timeout(self, execute_async, client, policy, logger):
+        ssh = self.get_ssh()
+
+        # noinspection PyTypeChecker
+        with self.assertRaises(exec_helpers.ParallelCallExceptions) as cm:
+            exec_helpers.SSHClient.execute_together(
+                remotes=[ssh], command=command, global_timeout=0)
+
+        execute_async.assert_not_called()
+        exc = cm.exception  # type: exec_helpers.ParallelCallExceptions
+        self.assertIsInstance(exc.exceptions[(host, port)], exec_helpers.ExecHelperTimeoutError)
+
+        # Waiting for governor slot is limited by global timeout
+        governor = exec_helpers.Governor(max_per_host=1)
+        exec_helpers.set_governor(governor)
+        self.addCleanup(exec_helpers.set_governor)
+        governor.acquire((host, port))
+
+        # noinspection PyTypeChecker
+        results = dict(exec_helpers.SSHClient.execute_together_iter(
+            remotes=[ssh], command=command, global_timeout=0.2))
+
+        execute_async.assert_not_called()
+        self.assertIsInstance(results[(host, port)], exec_helpers.ExecHelperTimeoutError)
+        self.assertEqual(governor.stats.in_flight, 1)
+
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_iter(self, execute_async, client, policy, logger):
+        side_effect = self.get_patched_channel_execute_async_side_effect(ec=1)
+
+        host2 = '127.0.0.2'
+
+        ssh = self.get_ssh()
+        # noinspection PyTypeChecker
+        ssh2 = exec_helpers.SSHClient(
+            host=host2,
+            port=port,
+            auth=exec_helpers.SSHAuth(
+                username=username,
+                password=password
+            ))
+
+        def execute_async_side_effect(*args, **kwargs):
+            if execute_async.call_count == 1:
+                return side_effect(*args, **kwargs)
+            raise RuntimeError()
+
+        execute_async.side_effect = execute_async_side_effect
+
+        # noinspection PyTypeChecker
+        results = dict(exec_helpers.SSHClient.execute_together_iter(
+            remotes=[ssh, ssh2], command=command))
+
+        self.assertEqual(sorted(results), [(host, port), (host2, port)])
+        values = sorted(results.values(), key=lambda item: isinstance(item, Exception))
+        self.assertIsInstance(values[0], exec_result.ExecResult)
+        self.assertEqual(values[0].exit_code, exec_helpers.ExitCodes.EX_ERROR)
+        self.assertIsInstance(values[1], RuntimeError)
+
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_iter_close(self, execute_async, client, policy, logger):
+        execute_async.side_effect = self.get_patched_channel_execute_async_side_effect()
+
+        ssh = self.get_ssh()
+
+        # noinspection PyTypeChecker
+        results = exec_helpers.SSHClient.execute_together_iter(remotes=[ssh], command=command)
+        key, result = next(results)
+        results.close()
+
+        self.assertEqual(key, (host, port))
+        self.assertEqual(result.cmd, command)
+        with self.assertRaises(StopIteration):
+            next(results)
+
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_multiplexed(self, execute_async, client, policy, logger):
+        execute_async.side_effect = self.get_patched_channel_execute_async_side_effect()
+
+        host2 = '127.0.0.2'
+
+        ssh = self.get_ssh()
+        # noinspection PyTypeChecker
+        ssh2 = exec_helpers.SSHClient(
+            host=host2,
+            port=port,
+            auth=exec_helpers.SSHAuth(
+                username=username,
+                password=password
+            ))
+
+        remotes = [ssh, ssh2]
+
+        # noinspection PyTypeChecker
+        results = exec_helpers.SSHClient.execute_together(
+            remotes=remotes, command=command, multiplexed=True, max_workers=1)
+
+        self.assertEqual(execute_async.call_count, len(remotes))
+        self.assertEqual(
+            list(sorted(results)),
+            [(host, port), (host2, port)]
+        )
+        for result in results.values():  # type: exec_result.ExecResult
+            self.assertEqual(result.cmd, command)
+            self.assertEqual(result.stdout, tuple(stdout_list))
+            self.assertEqual(result.stderr, tuple(stderr_list))
+            self.assertEqual(result.exit_code, exec_helpers.ExitCodes.EX_OK)
+
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_multiplexed_governed(self, execute_async, client, policy, logger):
+        execute_async.side_effect = self.get_patched_channel_execute_async_side_effect()
+
+        host2 = '127.0.0.2'
+
+        ssh = self.get_ssh()
+        # noinspection PyTypeChecker
+        ssh2 = exec_helpers.SSHClient(
+            host=host2,
+            port=port,
+            auth=exec_helpers.SSHAuth(
+                username=username,
+                password=password
+            ))
+
+        governor = exec_helpers.Governor(max_per_host=1)
+        exec_helpers.set_governor(governor)
+        self.addCleanup(exec_helpers.set_governor)
+        governor.acquire((host, port))  # Saturated host
+        timer = threading.Timer(1, governor.release, args=((host, port), ))
+        timer.start()
+        self.addCleanup(timer.join)
+
+        # noinspection PyTypeChecker
+        results = exec_helpers.SSHClient.execute_together_iter(
+            remotes=[ssh, ssh2], command=command, multiplexed=True)
+
+        # Saturated host does not block dispatch to other hosts
+        self.assertEqual(next(results)[0], (host2, port))
+        self.assertEqual(next(results)[0], (host, port))
+        self.assertEqual(governor.stats.in_flight, 0)
+
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_multiplexed_batch(self, execute_async, client, policy, logger):
+        execute_async.side_effect = self.get_patched_channel_execute_async_side_effect()
+
+        remotes = [
+            exec_helpers.SSHClient(
+                host='127.0.1.{}'.format(idx),
+                port=port,
+                auth=exec_helpers.SSHAuth(username=username, password=password)
+            ) for idx in range(3 * exec_helpers._ssh_reactor._DISPATCH_BATCH)
+        ]
+
+        # noinspection PyTypeChecker
+        results = exec_helpers.SSHClient.execute_together_iter(
+            remotes=remotes, command=command, multiplexed=True)
+
+        # Started channels are read before the next batch is dispatched
+        next(results)
+        self.assertEqual(execute_async.call_count, exec_helpers._ssh_reactor._DISPATCH_BATCH)
+        self.assertEqual(len(list(results)), len(remotes) - 1)
+        self.assertEqual(exec_helpers.get_governor().stats.in_flight, 0)
+
+    @mock.patch('selectors.DefaultSelector.register', side_effect=ValueError('Not selectable'))
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_multiplexed_register_fail(self, execute_async, register, client, policy, logger):
+        chan = FakeChannel(stdout=b''.join(stdout_list))
+        execute_async.return_value = chan, '', None, '',
+
+        # noinspection PyTypeChecker
+        results = dict(exec_helpers.SSHClient.execute_together_iter(
+            remotes=[self.get_ssh()], command=command, multiplexed=True))
+
+        self.assertIsInstance(results[(host, port)], ValueError)
+        chan.close.assert_called_once()
+        self.assertEqual(exec_helpers.get_governor().stats.in_flight, 0)
+
+    @mock.patch('time.monotonic', side_effect=itertools.count(0, 0.5))
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_multiplexed_timeout(self, execute_async, monotonic, client, policy, logger):
+        channels = []
+
+        def execute_async_side_effect(*args, **kwargs):
+            chan = FakeChannel(stdout=b''.join(stdout_list), completed=False)
+            channels.append(chan)
+            return chan, '', None, '',
+
+        execute_async.side_effect = execute_async_side_effect
+
+        ssh = self.get_ssh()
+
+        # noinspection PyTypeChecker
+        with self.assertRaises(exec_helpers.ParallelCallExceptions) as cm:
+            exec_helpers.SSHClient.execute_together(
+                remotes=[ssh], command=command, timeout=1, multiplexed=True)
+
+        exc = cm.exception  # type: exec_helpers.ParallelCallExceptions
+        exception = exc.exceptions[(host, port)]
+        self.assertIsInstance(exception, exec_helpers.ExecHelperTimeoutError)
+        self.assertEqual(exception.timeout, 1)
+        self.assertEqual(exception.result.stdout, tuple(stdout_list))
+        channels[0].close.assert_called_once()
+
+    def get_remotes(self, count):
+        """Build distinct remotes for parallel execution tests
+
+        :rtype: typing.List[exec_wrappers.SSHClient]
+        """
+        return [
+            exec_helpers.SSHClient(
+                host='127.0.0.{}'.format(idx + 1),
+                port=port,
+                auth=exec_helpers.SSHAuth(
+                    username=username,
+                    password=password
+                ))
+            for idx in range(count)
+        ]
+
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_rolling(self, execute_async, client, policy, logger):
+        execute_async.side_effect = self.get_patched_channel_execute_async_side_effect()
+
+        remotes = self.get_remotes(5)
+
+        # noinspection PyTypeChecker
+        results = exec_helpers.SSHClient.execute_together(
+            remotes=remotes, command=command, batch_size=0.5, canary=1, max_failure_ratio=0)
+
+        self.assertEqual(execute_async.call_count, len(remotes))
+        self.assertEqual(len(results), len(remotes))
+
+        with self.assertRaises(ValueError):
+            # noinspection PyTypeChecker
+            exec_helpers.SSHClient.execute_together(remotes=remotes, command=command, batch_size=0)
+
+        with self.assertRaises(ValueError):
+            # noinspection PyTypeChecker
+            exec_helpers.SSHClient.execute_together(remotes=remotes, command=command, batch_size=1.5)
+
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_rolling_abort(self, execute_async, client, policy, logger):
+        execute_async.side_effect = self.get_patched_channel_execute_async_side_effect(ec=1)
+
+        remotes = self.get_remotes(5)
+
+        # noinspection PyTypeChecker
+        with self.assertRaises(exec_helpers.ParallelCallProcessError) as cm:
+            exec_helpers.SSHClient.execute_together(
+                remotes=remotes, command=command, batch_size=2, max_failure_ratio=0.5, raise_on_err=False)
+
+        self.assertEqual(execute_async.call_count, 2)
+        exc = cm.exception  # type: exec_helpers.ParallelCallProcessError
+        self.assertEqual(
+            list(sorted(exc.errors)),
+            [(remote.hostname, remote.port) for remote in remotes[:2]]
+        )
+        self.assertEqual(
+            exc.skipped,
+            tuple((remote.hostname, remote.port) for remote in remotes[2:])
+        )
+
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_rolling_canary(self, execute_async, client, policy, logger):
+        execute_async.side_effect = [
+            self.get_patched_channel_execute_async_side_effect()(),
+            RuntimeError(),
+        ]
+
+        remotes = self.get_remotes(4)
+
+        # noinspection PyTypeChecker
+        with self.assertRaises(exec_helpers.ParallelCallExceptions) as cm:
+            exec_helpers.SSHClient.execute_together(remotes=remotes, command=command, canary=2)
+
+        self.assertEqual(execute_async.call_count, 2)
+        exc = cm.exception  # type: exec_helpers.ParallelCallExceptions
+        self.assertEqual(len(exc.results), 1)
+        self.assertEqual(len(exc.exceptions), 1)
+        self.assertEqual(len(exc.skipped), 2)
+
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_028_execute_together_dedup(self, execute_async, client, policy, logger):
+        execute_async.side_effect = [
+            self.get_patched_channel_execute_async_side_effect()(),
+            self.get_patched_channel_execute_async_side_effect()(),
+            self.get_patched_channel_execute_async_side_effect(ec=1)(),
+        ]
+
+        remotes = self.get_remotes(3)
+
+        # noinspection PyTypeChecker
+        results = exec_helpers.SSHClient.execute_together(
+            remotes=remotes, command=command, max_workers=1, dedup=True, raise_on_err=False)
+
+        first, second, third = results.values()
+        self.assertIs(first.stdout, second.stdout)
+        self.assertIs(first.stdout, third.stdout)
+        self.assertIs(first.stderr, second.stderr)
+        self.assertEqual(first.stdout, tuple(stdout_list))
+
+        groups = exec_helpers.SSHClient.group_by_output(results)
+        self.assertEqual(
+            sorted(sorted(group) for group in groups.values()),
+            sorted([
+                sorted(key for key, result in results.items() if result.exit_code == 0),
+                [key for key, result in results.items() if result.exit_code == 1],
+            ])
+        )
+
     @mock.patch('exec_helpers.ssh_client.SSHClient.execute')
     def test_029_check_call(self, execute, client, policy, logger):
         exit_code = 0
@@ -1301,6 +1704,61 @@ class TestExecute(unittest.TestCase):
             command, verbose, timeout=None,
             error_info=None, raise_on_err=raise_on_err)
 
+    @mock.patch('select.select')
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_032_execute_stream(self, execute_async, select, client, policy, logger):
+        chan = mock.Mock()
+        chan.status_event.is_set.side_effect = [False, False, True]
+        chan.recv_ready.side_effect = [True, False, False, True, False]
+        chan.recv.side_effect = [b' \n2', b'\n3\n ']
+        chan.recv_stderr_ready.side_effect = [False, True, False, False]
+        chan.recv_stderr.side_effect = [b'0\n']
+        chan.configure_mock(exit_status=0)
+
+        execute_async.return_value = chan, '', mock.Mock(), mock.Mock()
+
+        ssh = self.get_ssh()
+
+        # noinspection PyTypeChecker
+        with ssh.execute_stream(command=command, verbose=False) as stream:
+            self.assertEqual(stream.exit_code, exec_helpers.ExitCodes.EX_INVALID)
+            lines = list(stream)
+
+        self.assertEqual(
+            lines,
+            [('stdout', b' \n'), ('stderr', b'0\n'), ('stdout', b'2\n'), ('stdout', b'3\n'), ('stdout', b' ')]
+        )
+        self.assertEqual(stream.exit_code, exec_helpers.ExitCodes.EX_OK)
+        self.assertEqual(stream.cmd, command)
+        self.assertTrue(stream.closed)
+        execute_async.assert_called_once_with(command, verbose=False)
+        chan.close.assert_called_once()
+        select.assert_called_with([chan], [], [], 0.1)
+
+    @mock.patch('time.monotonic')
+    @mock.patch('select.select')
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    def test_033_execute_stream_timeout(self, execute_async, select, monotonic, client, policy, logger):
+        monotonic.side_effect = itertools.count(0, 0.5)
+        chan = mock.Mock()
+        chan.status_event.is_set.return_value = False
+        chan.recv_ready.return_value = False
+        chan.recv_stderr_ready.return_value = False
+
+        execute_async.return_value = chan, '', mock.Mock(), mock.Mock()
+
+        ssh = self.get_ssh()
+
+        # noinspection PyTypeChecker
+        stream = ssh.execute_stream(command=command, timeout=1)
+        with self.assertRaises(exec_helpers.ExecHelperTimeoutError):
+            list(stream)
+        self.assertTrue(stream.closed)
+        chan.close.assert_called_once()
+        # Lock is released on close
+        self.assertTrue(ssh.lock.acquire(blocking=False))
+        ssh.lock.release()
+
 
 @mock.patch('logging.getLogger', autospec=True)
 @mock.patch('paramiko.AutoAddPolicy', autospec=True, return_value='AutoAddPolicy')
@@ -1532,6 +1990,94 @@ class TestExecuteThrowHost(unittest.TestCase):
             mock.call.close()
         ))
 
+    def test_03_execute_through_host_auth_fail(self, transp, client, policy, logger):
+        (
+            open_session, transport, channel, get_transport,
+            open_channel, intermediate_channel
+        ) = self.prepare_execute_through_host(
+            transp, client, exit_code=0)
+
+        # noinspection PyTypeChecker
+        ssh = exec_helpers.SSHClient(
+            host=host,
+            port=port,
+            auth=exec_helpers.SSHAuth(
+                username=username,
+                password=password
+            ))
+
+        auth = mock.Mock(spec=exec_helpers.SSHAuth)
+        auth.connect.side_effect = paramiko.AuthenticationException('Denied')
+
+        governor = exec_helpers.Governor()
+        exec_helpers.set_governor(governor)
+        self.addCleanup(exec_helpers.set_governor)
+
+        with self.assertRaises(paramiko.AuthenticationException):
+            ssh.execute_through_host('127.0.0.2', command, auth=auth)
+
+        transport.close.assert_called_once_with()
+        intermediate_channel.close.assert_called_once_with()
+        open_session.assert_not_called()
+        self.assertEqual(governor.stats.acquired, 1)  # Target host is governed
+        self.assertEqual(governor.stats.in_flight, 0)
+
+    def test_04_execute_together_through_host(self, transp, client, policy, logger):
+        targets = ['127.0.0.2', '127.0.0.3']
+
+        (
+            open_session, transport, channel, get_transport,
+            open_channel, intermediate_channel
+        ) = self.prepare_execute_through_host(
+            transp, client, exit_code=0)
+
+        channels = []
+
+        def open_session_side_effect():
+            chan = FakeChannel(
+                stdout=b''.join(stdout_list),
+                stderr=b''.join(stderr_list),
+                exit_status=1 if len(channels) else 0,
+            )
+            chan.exec_command = mock.Mock()
+            channels.append(chan)
+            return chan
+
+        open_session.side_effect = open_session_side_effect
+
+        # noinspection PyTypeChecker
+        ssh = exec_helpers.SSHClient(
+            host=host,
+            port=port,
+            auth=exec_helpers.SSHAuth(
+                username=username,
+                password=password
+            ))
+
+        # noinspection PyTypeChecker
+        with self.assertRaises(exec_helpers.ParallelCallProcessError) as cm:
+            ssh.execute_together_through_host(targets, command, max_workers=1)
+
+        exc = cm.exception  # type: exec_helpers.ParallelCallProcessError
+        self.assertEqual(sorted(exc.results), [(target, 22) for target in targets])
+        self.assertEqual(len(exc.errors), 1)
+        for result in exc.results.values():
+            self.assertEqual(result.stdout, tuple(stdout_list))
+            self.assertEqual(result.stderr, tuple(stderr_list))
+
+        self.assertEqual(get_transport.call_count, len(targets))
+        open_channel.assert_has_calls(
+            [
+                mock.call(kind='direct-tcpip', dest_addr=(target, 22), src_addr=(host, 0))
+                for target in targets
+            ],
+            any_order=True
+        )
+        self.assertEqual(transport.close.call_count, len(targets))
+        self.assertEqual(intermediate_channel.close.call_count, len(targets))
+        for chan in channels:
+            chan.exec_command.assert_called_once_with(command)
+
 
 @mock.patch('logging.getLogger', autospec=True)
 @mock.patch('paramiko.AutoAddPolicy', autospec=True, return_value='AutoAddPolicy')
@@ -1779,6 +2325,118 @@ class TestSftp(unittest.TestCase):
             mock.call.put(source, target),
         ))
 
+    @mock.patch('exec_helpers.ssh_client.SSHClient.exists')
+    @mock.patch('exec_helpers.ssh_client.SSHClient.mkdir')
+    @mock.patch('exec_helpers.ssh_client.SSHClient.isdir')
+    def test_distribute(self, remote_isdir, mkdir, exists, client, policy, logger):
+        ssh, _sftp = self.prepare_sftp_file_tests(client)
+        # noinspection PyTypeChecker
+        ssh2 = exec_helpers.SSHClient(
+            host='127.0.0.2',
+            port=port,
+            auth=exec_helpers.SSHAuth(
+                username=username,
+                password=password
+            ))
+        remote_isdir.return_value = True
+        exists.return_value = False
+
+        uploaded = {}
+        maps = []
+
+        def putfo(fl, remotepath, file_size):
+            self.assertLessEqual(len([mapped for mapped in maps if not mapped.closed]), 1)  # Mapped on demand
+            data = b''
+            chunk = fl.read(4)
+            while chunk:
+                data += chunk
+                chunk = fl.read(4)
+            self.assertEqual(len(data), file_size)
+            uploaded.setdefault(remotepath, []).append(data)
+
+        _sftp.putfo.side_effect = putfo
+
+        source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        os.mkdir(os.path.join(source, 'sub'))
+        with open(os.path.join(source, 'file'), 'wb') as f:
+            f.write(b'content')
+        with open(os.path.join(source, 'sub', 'other'), 'wb') as f:
+            f.write(b'other')
+        with open(os.path.join(source, 'sub', 'empty'), 'wb'):
+            pass
+
+        real_mmap = mmap.mmap
+
+        def track_mmap(*args, **kwargs):
+            maps.append(real_mmap(*args, **kwargs))
+            return maps[-1]
+
+        # noinspection PyTypeChecker
+        with mock.patch('mmap.mmap', side_effect=track_mmap):
+            results = exec_helpers.SSHClient.distribute(
+                source, '/opt', [ssh, ssh2], max_workers=1, bandwidth=10 ** 9
+            )
+        self.assertEqual(len(maps), 4)  # 2 non-empty files for each remote
+        self.assertTrue(all(mapped.closed for mapped in maps))
+
+        self.assertEqual(results, {(host, port): 12, ('127.0.0.2', port): 12})
+        expected_path = posixpath.join('/opt', os.path.basename(source))
+        self.assertEqual(
+            uploaded,
+            {
+                posixpath.join(expected_path, 'file'): [b'content', b'content'],
+                posixpath.join(expected_path, 'sub/other'): [b'other', b'other'],
+                posixpath.join(expected_path, 'sub/empty'): [b'', b''],
+            }
+        )
+        mkdir.assert_has_calls((mock.call(expected_path), mock.call(posixpath.join(expected_path, 'sub'))))
+
+        # Concurrent uploads share mapping, it is closed after the last one
+        with exec_helpers._file_distribution.LocalTree(os.path.join(source, 'file')) as tree:
+            with tree.content(0) as first, tree.content(0) as second:
+                self.assertIs(first, second)
+                self.assertEqual(tree.mapped, 1)
+            self.assertEqual(tree.mapped, 0)
+
+        # Failure is reported per remote
+        _sftp.putfo.side_effect = IOError('Failed')
+        # noinspection PyTypeChecker
+        results = exec_helpers.SSHClient.distribute(os.path.join(source, 'file'), '/opt', [ssh])
+        self.assertIsInstance(results[(host, port)], IOError)
+
+    @mock.patch('exec_helpers.ssh_client.SSHClient._exec_command')
+    @mock.patch('exec_helpers.ssh_client.SSHClient.execute_async')
+    @mock.patch('exec_helpers.ssh_client.SSHClient.exists')
+    @mock.patch('exec_helpers.ssh_client.SSHClient.isdir')
+    def test_distribute_governed(self, remote_isdir, exists, execute_async, exec_command, client, policy, logger):
+        ssh, _sftp = self.prepare_sftp_file_tests(client)
+        remote_isdir.return_value = False
+        exists.return_value = False
+        execute_async.return_value = None, None, None, None
+        exec_command.return_value = exec_helpers.ExecResult(cmd='mkdir', exit_code=0)
+
+        exec_helpers.set_governor(exec_helpers.Governor(max_per_host=1))
+        self.addCleanup(exec_helpers.set_governor)
+
+        source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source)
+        os.mkdir(os.path.join(source, 'sub'))
+        with open(os.path.join(source, 'sub', 'file'), 'wb') as f:
+            f.write(b'content')
+
+        results = {}
+        worker = threading.Thread(
+            target=lambda: results.update(exec_helpers.SSHClient.distribute(source, '/opt', [ssh])),
+            daemon=True,
+        )
+        worker.start()
+        worker.join(timeout=10)
+        self.assertFalse(worker.is_alive(), 'Upload is blocked by governor')
+        self.assertEqual(results, {(host, port): 7})
+        self.assertEqual(exec_command.call_count, 2)  # mkdir for directories
+        self.assertEqual(exec_helpers.get_governor().stats.in_flight, 0)
+
     @mock.patch('exec_helpers.ssh_client.SSHClient.exists')
     @mock.patch('exec_helpers.ssh_client.SSHClient.mkdir')
     @mock.patch('os.walk')
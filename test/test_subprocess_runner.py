@@ -21,8 +21,10 @@ from __future__ import division
 from __future__ import unicode_literals
 
 import errno
+import gc
 import logging
 import subprocess
+import threading
 import unittest
 
 import mock
@@ -795,6 +797,90 @@ class TestSubprocessRunner(unittest.TestCase):
             ),
         ))
 
+    def test_014_execute_stream(
+        self,
+        popen,  # type: mock.MagicMock
+        logger  # type: mock.MagicMock
+    ):  # type: (...) -> None
+        popen_obj, _ = self.prepare_close(popen, ec=1)
+        popen_obj.poll.return_value = 1
+
+        runner = exec_helpers.Subprocess()
+
+        # noinspection PyTypeChecker
+        with runner.execute_stream(command) as stream:
+            lines = list(stream)
+
+        self.assertEqual(
+            [line for name, line in lines if name == 'stdout'],
+            stdout_list
+        )
+        self.assertEqual(
+            [line for name, line in lines if name == 'stderr'],
+            stderr_list
+        )
+        self.assertEqual(stream.exit_code, exec_helpers.ExitCodes.EX_ERROR)
+        self.assertIn(
+            mock.call.wait(timeout=mock.ANY), popen_obj.mock_calls
+        )
+        popen_obj.kill.assert_not_called()
+
+    def test_015_execute_stream_close(
+        self,
+        popen,  # type: mock.MagicMock
+        logger  # type: mock.MagicMock
+    ):  # type: (...) -> None
+        popen_obj, _ = self.prepare_close(popen)
+        popen_obj.poll.return_value = None
+
+        runner = exec_helpers.Subprocess()
+
+        # noinspection PyTypeChecker
+        with runner.execute_stream(command) as stream:
+            next(stream)
+
+        self.assertTrue(stream.closed)
+        self.assertEqual(stream.exit_code, exec_helpers.ExitCodes.EX_INVALID)
+        popen_obj.kill.assert_called_once()
+
+    def test_016_execute_stream_release(
+        self,
+        popen,  # type: mock.MagicMock
+        logger  # type: mock.MagicMock
+    ):  # type: (...) -> None
+        popen_obj, _ = self.prepare_close(popen)
+        popen_obj.poll.return_value = None
+
+        governor = exec_helpers.Governor(max_per_host=1)
+        exec_helpers.set_governor(governor)
+        self.addCleanup(exec_helpers.set_governor)
+
+        runner = exec_helpers.Subprocess()
+
+        # Closed before the first line: command is stopped
+        stream = runner.execute_stream(command)
+        self.assertEqual(governor.stats.in_flight, 1)
+        stream.close()
+        self.assertTrue(stream.closed)
+        popen_obj.kill.assert_called_once()
+        self.assertEqual(governor.stats.in_flight, 0)
+
+        # Not closed explicitly: released on garbage collection
+        popen_obj.kill.reset_mock()
+        for _ in runner.execute_stream(command):
+            break
+        gc.collect()
+        popen_obj.kill.assert_called_once()
+        self.assertEqual(governor.stats.in_flight, 0)
+
+        # Lock is not held by open stream
+        stream = runner.execute_stream(command)
+        locker = threading.Thread(target=lambda: runner.lock.acquire() and runner.lock.release())
+        locker.start()
+        locker.join(timeout=5)
+        self.assertFalse(locker.is_alive())
+        stream.close()
+
 
 @mock.patch('exec_helpers.subprocess_runner.logger', autospec=True)
 @mock.patch('exec_helpers.subprocess_runner.Subprocess.execute')